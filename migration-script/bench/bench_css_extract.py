@@ -0,0 +1,101 @@
+# Checks html_extract against BeautifulSoup on every css-examples page and
+# times both.
+#
+#   python bench/bench_css_extract.py [--interactive-examples PATH]
+#
+# Without an interactive-examples checkout, a generated set of pages shaped
+# like the css-examples is used.
+
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_extract import extract_css_example_fast, extract_css_example_soup  # noqa: E402
+
+
+def generated_pages(count, seed=0):
+    rng = random.Random(seed)
+    properties = ["flex-basis", "border-image", "color", "transform", "grid-template-areas"]
+    values = ["auto;", "10px solid red;", "url(\"/media/examples/star.png\") 30;",
+              "rotate(45deg)\n  translate(10px, 20px);", '"a b"\n    "c d";']
+    elements = [
+        '<div class="transition-all" id="example-element">This is a box.</div>',
+        '<img src="/media/examples/hand.jpg" alt="A hand" id="example-element">',
+        '<p id="example-element">London. Michaelmas term lately over, and the Lord Chancellor sitting in Lincoln\'s Inn Hall.</p>',
+        '<div id="example-element">\n      <div>One</div>\n      <div>Two</div>\n      <div>Three</div>\n    </div>',
+        '<input type="checkbox" id="example-element" checked>\n    <label for="example-element">Check</label>',
+        '<!-- comment -->\n    <span class="a b">x &lt; y</span>',
+    ]
+    for _ in range(count):
+        prop = rng.choice(properties)
+        choices = "\n".join(
+            f'''  <div class="example-choice">
+    <pre><code class="language-css">{prop}: {rng.choice(values)}</code></pre>
+    <button type="button" class="copy hidden" aria-hidden="true">
+      <span class="visually-hidden">Copy to Clipboard</span>
+    </button>
+  </div>''' for _ in range(rng.randint(2, 6)))
+        body = "\n    ".join(rng.choice(elements) for _ in range(rng.randint(1, 4)))
+        yield f'''<section id="example-choice-list" class="example-choice-list large" data-property="{prop}">
+{choices}
+</section>
+
+<div id="output" class="output large hidden">
+  <section id="default-example" class="default-example">
+    {body}
+  </section>
+</div>
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark html_extract against BeautifulSoup.")
+    parser.add_argument("--interactive-examples", metavar="PATH")
+    parser.add_argument("--pages", type=int, default=1000,
+                        help="number of generated pages without a checkout (default: %(default)s)")
+    args = parser.parse_args()
+
+    if args.interactive_examples:
+        pattern = os.path.join(args.interactive_examples, "live-examples/css-examples/**/*.html")
+        pages = []
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            with open(path, "r") as file:
+                pages.append((path, file.read()))
+    else:
+        pages = list(enumerate(generated_pages(args.pages)))
+
+    soup_time = fast_time = 0
+    fallbacks = mismatches = 0
+    for name, page in pages:
+        start = time.perf_counter()
+        try:
+            expected = extract_css_example_soup(page)
+        except AttributeError:
+            # not a css example page, no #output
+            expected = None
+        soup_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = extract_css_example_fast(page)
+        fast_time += time.perf_counter() - start
+
+        if actual is None:
+            fallbacks += 1
+        elif actual != expected:
+            mismatches += 1
+            print(f"Mismatch: {name}")
+
+    print(f"pages: {len(pages)}, fast path: {len(pages) - fallbacks}, "
+          f"fallbacks: {fallbacks}, mismatches: {mismatches}")
+    print(f"BeautifulSoup: {soup_time * 1000:.0f} ms")
+    print(f"html_extract:  {fast_time * 1000:.0f} ms ({soup_time / fast_time:.1f}x)")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# Compares css_normalize.normalize_output_css with the map_media and
+# str.replace chain it replaced, on every css-examples stylesheet, and times
+# both.
+#
+#   python bench/bench_css_normalize.py [--interactive-examples PATH] [--repeat N]
+#
+# The outputs only differ where the chain rewrote text that is not a selector,
+# e.g. in comments or strings; those sources are listed.
+
+import argparse
+import glob
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from css_normalize import normalize_output_css  # noqa: E402
+from lib import MediaReport, map_media, media_map  # noqa: E402
+
+
+def legacy_normalize(css_example_src, report):
+    if "url(" in css_example_src:
+        css_example_src = map_media(css_example_src, report)
+    return css_example_src.replace("#output {", "body {").replace(
+        ".output {", "body {").replace("#output ", "").replace(".output ", "")
+
+
+def generated_sources(count, seed=0):
+    rng = random.Random(seed)
+    media = list(media_map) + ["/media/examples/unknown.png"]
+    rules = [
+        "#output {\n  display: flex;\n  gap: 10px;\n}\n",
+        ".output {\n  background-color: #eee;\n}\n",
+        "#output #example-element {\n  width: 60%;\n  color: rebeccapurple;\n}\n",
+        "#example-element {\n  border: 1px solid black;\n  padding: 0.75em;\n}\n",
+        ".output .transition-all {\n  transition: all 0.5s;\n}\n",
+        "@media (prefers-reduced-motion: reduce) {\n  #output .a {\n    animation: none;\n  }\n}\n",
+        "/* Avoid styling #output directly */\n",
+    ]
+    for _ in range(count):
+        source = "".join(rng.choice(rules) for _ in range(rng.randint(2, 8)))
+        if rng.random() < 0.5:
+            source += f'#example-element {{\n  background: url("{rng.choice(media)}") no-repeat;\n}}\n'
+        yield source
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the css output normalizer.")
+    parser.add_argument("--interactive-examples", metavar="PATH")
+    parser.add_argument("--sources", type=int, default=2000,
+                        help="number of generated stylesheets without a checkout (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.interactive_examples:
+        pattern = os.path.join(args.interactive_examples, "live-examples/css-examples/**/*.css")
+        sources = []
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            with open(path, "r") as file:
+                sources.append((path, file.read()))
+    else:
+        sources = list(enumerate(generated_sources(args.sources)))
+
+    differences = 0
+    for name, source in sources:
+        if normalize_output_css(source, MediaReport()) != legacy_normalize(source, MediaReport()):
+            differences += 1
+            print(f"Differs: {name}")
+    print(f"sources: {len(sources)}, different output: {differences}")
+
+    codes = [source for name, source in sources]
+    legacy_time = min(timeit.repeat(
+        lambda: [legacy_normalize(code, MediaReport()) for code in codes], number=1, repeat=args.repeat))
+    tokenizer_time = min(timeit.repeat(
+        lambda: [normalize_output_css(code, MediaReport()) for code in codes], number=1, repeat=args.repeat))
+    print(f"replace chain: {legacy_time * 1000:.1f} ms")
+    print(f"tokenizer:     {tokenizer_time * 1000:.1f} ms ({legacy_time / tokenizer_time:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Microbenchmark for lib.map_media against the previous lazy-regex version.
+#
+#   python bench/bench_media.py [--size BYTES] [--repeat N]
+
+import argparse
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib import MediaReport, map_media, media_map  # noqa: E402
+
+
+def legacy_map_media(code):
+    if "media/" not in code:
+        return code
+
+    def replace(match):
+        old_media = match.group(1)
+        old_media_normalized = old_media.removeprefix("../..")
+
+        if new_media := media_map.get(old_media_normalized):
+            return match.group(0).replace(old_media, new_media)
+
+        return match.group(0)
+
+    return re.sub(r"""([./]*\/media\/\S*?)["')]""", replace, code)
+
+
+def make_source(size, density, seed=0):
+    rng = random.Random(seed)
+    known = list(media_map)
+    filler = [
+        '  <div class="example">Some text, then more words.</div>\n',
+        "  background: linear-gradient(red, blue);\n",
+        "console.log(array.map((x) => x * 2));\n",
+    ]
+    references = [
+        lambda: f'<img src="{rng.choice(known)}">\n',
+        lambda: f"background: url(../..{rng.choice(known)});\n",
+        lambda: f"fetch('{rng.choice(known)}');\n",
+        lambda: '<img src="/media/examples/not-mapped.png">\n',
+        lambda: "see /media/examples/plain text\n",
+    ]
+    parts = []
+    length = 0
+    while length < size:
+        part = rng.choice(references)() if rng.random() < density else rng.choice(filler)
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark lib.map_media.")
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--density", type=float, default=0.05,
+                        help="share of lines referencing media (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    code = make_source(args.size, args.density)
+    assert map_media(code, MediaReport()) == legacy_map_media(code), "outputs differ"
+
+    legacy = min(timeit.repeat(lambda: legacy_map_media(code), number=1, repeat=args.repeat))
+    current = min(timeit.repeat(lambda: map_media(code, MediaReport()),
+                                number=1, repeat=args.repeat))
+    print(f"input: {len(code)} chars, density {args.density}")
+    print(f"legacy map_media: {legacy * 1000:.1f} ms")
+    print(f"map_media:        {current * 1000:.1f} ms ({legacy / current:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
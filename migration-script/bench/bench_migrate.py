@@ -0,0 +1,171 @@
+# Benchmarks the migration on a generated corpus (see corpus.py), per stage and
+# end to end for every converter, and prints the results as JSON so runs on
+# different commits can be compared.
+#
+#   python bench/bench_migrate.py --pages 5000 --output results.json
+#   python bench/bench_migrate.py --only end_to_end --jobs 4
+#
+# Peak memory is the tracemalloc peak of a second, untimed run of each
+# benchmark; worker processes of parallel runs are not included.
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus  # noqa: E402
+import sources  # noqa: E402
+from converters import all_types, find_macros, replace_macros  # noqa: E402
+from lib import MediaReport, map_media  # noqa: E402
+from meta_index import example_sources, load_meta_index  # noqa: E402
+from migrate import main as migrate_main  # noqa: E402
+from walker import find_index_files  # noqa: E402
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return None
+
+
+def read_files(paths):
+    contents = []
+    for path in paths:
+        with open(path, "r") as file:
+            contents.append((path, file.read()))
+    return contents
+
+
+def benchmarks(content, interactive_examples, work, jobs):
+    # (name, setup, run, items); setup runs before every measurement and its
+    # result is passed to run, which returns nothing
+    md_files = list(find_index_files(content))
+    pages = read_files(md_files)
+    meta_index = load_meta_index(interactive_examples, use_cache=False)
+    source_paths = sorted({os.path.join(interactive_examples, path)
+                           for meta in meta_index.values() for path in example_sources(meta)})
+    example_codes = [code for path, code in read_files(source_paths)]
+
+    def no_setup():
+        return None
+
+    def cold_sources():
+        sources.load_normalized.cache_clear()
+        sources.digest_file.cache_clear()
+
+    yield ("meta_index", no_setup,
+           lambda _: load_meta_index(interactive_examples, use_cache=False), len(meta_index))
+    yield ("find_macros", no_setup,
+           lambda _: [find_macros(page) for md_file, page in pages], len(pages))
+    yield ("map_media", no_setup,
+           lambda _: [map_media(code, MediaReport()) for code in example_codes], len(example_codes))
+
+    for example_type in all_types:
+        def run_replace(_, types=(example_type,)):
+            for md_file, page in pages:
+                replace_macros(page, md_file, meta_index, interactive_examples, types,
+                               log=lambda message: None)
+        yield f"replace_macros[{example_type}]", cold_sources, run_replace, len(pages)
+
+    def fresh_content():
+        cold_sources()
+        copy = os.path.join(work, "content")
+        shutil.rmtree(copy, ignore_errors=True)
+        shutil.copytree(content, copy)
+        return copy
+
+    for types in [(example_type,) for example_type in all_types] + [all_types]:
+        def run_migrate(copy, types=types):
+            argv = ["--content", copy, "--interactive-examples", interactive_examples,
+                    "--jobs", str(jobs), "--no-cache",
+                    "--slug-index", os.path.join(work, "slug-index.json"), "--types", *types]
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                migrate_main(argv)
+        name = "all" if types == all_types else types[0]
+        yield f"end_to_end[{name}]", fresh_content, run_migrate, len(pages)
+
+
+def measure(setup, run, repeat, memory):
+    timings = []
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        timings.append(time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        state = setup()
+        tracemalloc.start()
+        run(state)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return min(timings), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the migration on a generated corpus.")
+    parser.add_argument("--pages", type=int, default=2000, help="index.md files (default: %(default)s)")
+    parser.add_argument("--examples", type=int, default=100,
+                        help="examples per converter type (default: %(default)s)")
+    parser.add_argument("--density", type=float, default=0.8,
+                        help="average extra macros per page (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="timed runs per benchmark, the fastest is reported (default: %(default)s)")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="worker processes for the end to end runs (default: %(default)s)")
+    parser.add_argument("--only", metavar="PREFIX", action="append",
+                        help="only run benchmarks whose name starts with PREFIX; repeatable")
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak memory runs")
+    parser.add_argument("--output", metavar="PATH", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="migration-bench-")
+    try:
+        content, interactive_examples = corpus.generate(
+            work, args.pages, args.examples, args.density, args.seed)
+        corpus_content = os.path.join(work, "corpus-content")
+        os.rename(content, corpus_content)
+
+        results = []
+        for name, setup, run, items in benchmarks(corpus_content, interactive_examples,
+                                                  work, args.jobs):
+            if args.only and not any(name.startswith(prefix) for prefix in args.only):
+                continue
+            seconds, peak = measure(setup, run, args.repeat, not args.no_memory)
+            results.append({"name": name, "items": items, "seconds": round(seconds, 6),
+                            "items_per_second": round(items / seconds, 1),
+                            "peak_memory_bytes": peak})
+            print(f"{name:<28} {items / seconds:>12.1f} items/s"
+                  + (f" {peak / 1e6:>10.1f} MB" if peak is not None else ""), file=sys.stderr)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "config": {"pages": args.pages, "examples": args.examples, "density": args.density,
+                   "seed": args.seed, "repeat": args.repeat, "jobs": args.jobs},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# Checks renderer.render against the f-string templates the converters used
+# before, for every example type, and times both.
+#
+#   python bench/bench_render.py [--cases N] [--repeat N]
+
+import argparse
+import html
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from renderer import render  # noqa: E402
+
+
+def format_suffix(suffix):
+    return f'''
+
+{suffix}''' if suffix and "interactive-examples" not in suffix else ""
+
+
+def legacy_css(title, other_args, suffix, choices, html_src, css, js):
+    css_choice_fences = "\n\n".join(
+        f"""```css interactive-example-choice
+{css_choice.rstrip()}
+```"""
+        for css_choice in choices
+    )
+
+    return f"""{{{{InteractiveExample("{html.escape(title, quote=True)}"{f", {other_args}" if other_args else ""})}}}}
+
+{css_choice_fences}
+
+```html interactive-example
+{html_src}
+```{f'''
+
+```css interactive-example
+{css.rstrip()}
+```''' if css else ""}{f'''
+
+```js interactive-example
+{js.rstrip()}
+```''' if js else ""}{format_suffix(suffix)}"""
+
+
+def legacy_js(title, other_args, suffix, code):
+    return f"""{{{{InteractiveExample("{title}"{f", {other_args}" if other_args else ""})}}}}
+
+```js interactive-example
+{code.rstrip()}
+```{format_suffix(suffix)}"""
+
+
+def legacy_html(title, other_args, suffix, html_src, css, js):
+    return f"""{{{{InteractiveExample("{html.escape(title, quote=True)}"{f", {other_args}" if other_args else ""})}}}}
+
+```html interactive-example
+{html_src.rstrip()}
+```{f'''
+
+```css interactive-example
+{css.rstrip()}
+```''' if css else ""}{f'''
+
+```js interactive-example
+{js.rstrip()}
+```''' if js else ""}{format_suffix(suffix)}"""
+
+
+def legacy_wat(title, other_args, suffix, wat, js):
+    return f"""{{{{InteractiveExample("{html.escape(title, quote=True)}"{f", {other_args}" if other_args else ""})}}}}
+
+```wat interactive-example
+{wat.strip()}
+```
+
+{f'''```js interactive-example
+{js.rstrip()}
+```''' if js else ""}{format_suffix(suffix)}"""
+
+
+def legacy_css_tabbed(title, other_args, suffix, css, html_src, js):
+    return f"""{{{{InteractiveExample("{html.escape(title.replace("HTML Demo:", "CSS Demo:"), quote=True)}"{f", {other_args}" if other_args else ""})}}}}
+
+```css interactive-example
+{css.rstrip()}
+```
+
+```html interactive-example
+{html_src.rstrip()}
+```
+
+{f'''```js interactive-example
+{js.rstrip()}
+```''' if js else ""}{format_suffix(suffix)}"""
+
+
+def make_cases(count, seed=0):
+    # (example type, legacy call, render call) with random sources, including
+    # empty and missing ones
+    rng = random.Random(seed)
+    titles = ["CSS Demo: flex-basis", "HTML Demo: <object>", 'JavaScript Demo: "quotes" & more',
+              "Wat Demo: add"]
+    other_args_choices = ["", '"taller"', '"tabbed-standard"']
+    suffixes = ["", "", "Some text.", "The source for this interactive example is stored in interactive-examples"]
+
+    def source(optional=True):
+        if optional and rng.random() < 0.3:
+            return rng.choice([None, ""])
+        lines = rng.choice(["a { color: red; }", "console.log(1);", "<p>Hi</p>", "(module)"])
+        return "\n" * rng.randint(0, 1) + "\n".join([lines] * rng.randint(1, 5)) + "\n" * rng.randint(0, 2)
+
+    cases = []
+    for _ in range(count):
+        head = (rng.choice(titles), rng.choice(other_args_choices), rng.choice(suffixes))
+        example_type = rng.choice(["css", "js", "html", "wat", "css-tabbed"])
+        if example_type == "css":
+            choices = tuple(source(False) for _ in range(rng.randint(0, 5)))
+            html_src, css, js = source(False).strip(), source(), source()
+            cases.append((example_type,
+                          lambda head=head, args=(choices, html_src, css, js): legacy_css(*head, *args),
+                          lambda head=head, sources=dict(choices=choices, html=html_src, css=css, js=js):
+                          render("css", *head, **sources)))
+        elif example_type == "js":
+            code = source(False)
+            cases.append((example_type,
+                          lambda head=head, code=code: legacy_js(*head, code),
+                          lambda head=head, code=code: render("js", *head, js=code)))
+        elif example_type == "html":
+            html_src, css, js = source(False), source(), source()
+            cases.append((example_type,
+                          lambda head=head, args=(html_src, css, js): legacy_html(*head, *args),
+                          lambda head=head, sources=dict(html=html_src, css=css, js=js):
+                          render("html", *head, **sources)))
+        elif example_type == "wat":
+            wat, js = source(False), source()
+            cases.append((example_type,
+                          lambda head=head, args=(wat, js): legacy_wat(*head, *args),
+                          lambda head=head, sources=dict(wat=wat, js=js): render("wat", *head, **sources)))
+        else:
+            css, html_src, js = source(False), source(False), source()
+            cases.append((example_type,
+                          lambda head=head, args=(css, html_src, js): legacy_css_tabbed(*head, *args),
+                          lambda head=head, sources=dict(css=css, html=html_src, js=js):
+                          render("css-tabbed", *head, **sources)))
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and benchmark renderer.render.")
+    parser.add_argument("--cases", type=int, default=2000, help="random macros (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cases = make_cases(args.cases)
+    mismatches = 0
+    for example_type, legacy, new in cases:
+        if legacy() != new():
+            mismatches += 1
+            print(f"Mismatch ({example_type}):\n{legacy()!r}\n{new()!r}")
+    print(f"cases: {len(cases)}, mismatches: {mismatches}")
+
+    legacy_time = min(timeit.repeat(lambda: [legacy() for _, legacy, _ in cases],
+                                     number=1, repeat=args.repeat))
+    render_time = min(timeit.repeat(lambda: [new() for _, _, new in cases],
+                                    number=1, repeat=args.repeat))
+    print(f"f-strings: {legacy_time / len(cases) * 1e6:.2f} us per macro")
+    print(f"renderer:  {render_time / len(cases) * 1e6:.2f} us per macro")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
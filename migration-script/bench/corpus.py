@@ -0,0 +1,184 @@
+# Generates a synthetic content tree and interactive-examples checkout shaped
+# like the real ones, for the benchmarks.
+#
+#   python bench/corpus.py /tmp/corpus --pages 10000 --density 0.8
+#
+# Every converter type gets --examples examples: css pages with choices and
+# #output, js, wat with a js host, html tabbed examples and css tabbed ones,
+# with a share of their sources referencing /media/ paths.
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_css_extract import generated_pages  # noqa: E402
+from lib import media_map  # noqa: E402
+
+locales = ["en-us", "en-us", "en-us", "es", "fr", "ja", "ko", "pt-br", "ru", "zh-cn"]
+suffixes = ["", "", "", ', "taller"', ', "shorter"', ', "tabbed-standard"']
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(text)
+
+
+def media(rng):
+    if rng.random() < 0.1:
+        return "/media/examples/not-in-the-map.png"
+    old_media = rng.choice(list(media_map))
+    return f"../..{old_media}" if rng.random() < 0.2 else old_media
+
+
+def css_source(rng, selector="#example-element"):
+    lines = [f"{selector} {{", "  color: rebeccapurple;"]
+    if rng.random() < 0.5:
+        lines.append(f'  background: url("{media(rng)}");')
+    lines.append("}")
+    if rng.random() < 0.5:
+        lines = ["#output {", "  display: flex;", "}", ""] + lines
+    return "\n".join(lines) + "\n"
+
+
+def js_source(rng, name):
+    lines = [f"const {name} = [1, 2, 3];", f"console.log({name}.map((x) => x * 2));",
+             "// Expected output: Array [2, 4, 6]"]
+    if rng.random() < 0.3:
+        lines.append(f'fetch("{media(rng)}");')
+    return "\n".join(lines * rng.randint(1, 4)) + "\n\n"
+
+
+def html_source(rng):
+    return (f'<figure>\n  <img src="{media(rng)}" alt="An example" />\n'
+            f"  <figcaption>Caption &amp;shy; text</figcaption>\n</figure>\n")
+
+
+def generate_examples(interactive_examples, count, rng):
+    # Returns the built paths of every generated example, per converter type
+    built = {"css": [], "js": [], "html": [], "wat": [], "css-tabbed": []}
+    meta = {"css-examples": {}, "js-examples": {}, "html-examples": {}, "wat-examples": {}}
+
+    css_pages = generated_pages(count, seed=rng.randrange(1 << 30))
+    for i, page in enumerate(css_pages):
+        name = f"css-{i}"
+        folder = f"live-examples/css-examples/group-{i % 20}"
+        write(os.path.join(interactive_examples, folder, f"{name}.html"), page)
+        write(os.path.join(interactive_examples, folder, f"{name}.css"), css_source(rng))
+        meta["css-examples"].setdefault(folder, {})[name] = {
+            "exampleCode": f"{folder}/{name}.html", "cssExampleSrc": f"{folder}/{name}.css",
+            "fileName": f"{name}.html", "title": f"CSS Demo: {name}", "type": "css",
+        }
+        built["css"].append(f"pages/css/{name}.html")
+
+        name = f"css-tabbed-{i}"
+        write(os.path.join(interactive_examples, folder, f"{name}.html"), html_source(rng))
+        write(os.path.join(interactive_examples, folder, f"{name}.css"), css_source(rng, "figure"))
+        meta["css-examples"][folder][name] = {
+            "exampleCode": f"{folder}/{name}.html", "cssExampleSrc": f"{folder}/{name}.css",
+            "fileName": f"{name}.html", "title": f"CSS Demo: <{name}>", "type": "tabbed",
+        }
+        built["css-tabbed"].append(f"pages/tabbed/{name}.html")
+
+    for i in range(count):
+        name = f"js-{i}"
+        folder = f"live-examples/js-examples/group-{i % 20}"
+        write(os.path.join(interactive_examples, folder, f"{name}.js"), js_source(rng, f"array{i}"))
+        meta["js-examples"].setdefault(folder, {})[name] = {
+            "exampleCode": f"{folder}/{name}.js", "fileName": f"{name}.html",
+            "title": f"JavaScript Demo: {name}", "type": "js",
+        }
+        built["js"].append(f"pages/js/{name}.html")
+
+        name = f"html-{i}"
+        folder = f"live-examples/html-examples/group-{i % 20}"
+        write(os.path.join(interactive_examples, folder, f"{name}.html"), html_source(rng))
+        entry = {"exampleCode": f"{folder}/{name}.html", "fileName": f"{name}.html",
+                 "title": f"HTML Demo: <{name}>", "type": "tabbed"}
+        if i % 2:
+            write(os.path.join(interactive_examples, folder, f"{name}.css"), css_source(rng, "figure"))
+            entry["cssExampleSrc"] = f"{folder}/{name}.css"
+        if i % 3 == 0:
+            write(os.path.join(interactive_examples, folder, f"{name}.js"), js_source(rng, "figure"))
+            entry["jsExampleSrc"] = f"{folder}/{name}.js"
+        meta["html-examples"].setdefault(folder, {})[name] = entry
+        built["html"].append(f"pages/tabbed/{name}.html")
+
+        name = f"wat-{i}"
+        folder = f"live-examples/wat-examples/group-{i % 20}"
+        write(os.path.join(interactive_examples, folder, f"{name}.wat"),
+              f'(module\n  (func (export "{name}") (param i32) (result i32)\n    local.get 0))\n')
+        write(os.path.join(interactive_examples, folder, f"{name}.js"),
+              f'WebAssembly.instantiateStreaming(fetch("{media(rng)}")).then(console.log);\n')
+        meta["wat-examples"].setdefault(folder, {})[name] = {
+            "watExampleCode": f"{folder}/{name}.wat", "jsExampleCode": f"{folder}/{name}.js",
+            "fileName": f"{name}.html", "title": f"Wat Demo: {name}", "type": "wat",
+        }
+        built["wat"].append(f"pages/wat/{name}.html")
+
+    for folders in meta.values():
+        for folder, pages in folders.items():
+            write(os.path.join(interactive_examples, folder, "meta.json"),
+                  json.dumps({"pages": pages}, indent=4))
+    return built
+
+
+def generate_page(rng, built_paths, density):
+    lines = ["---", f"title: page {rng.randrange(1 << 30)}", "---", "", "{{Ref}}", ""]
+    # One macro on most pages, followed by `density` more on average
+    macros = 0
+    while rng.random() < (0.9 if macros == 0 else density / (1 + density)):
+        macros += 1
+    for _ in range(macros):
+        lines.append(f'{{{{EmbedInteractiveExample("{rng.choice(built_paths)}"{rng.choice(suffixes)})}}}}')
+        lines.append("")
+        lines.extend(["Some prose about the feature, long enough to look like a paragraph."] * 3)
+        lines.append("")
+    if rng.random() < 0.02:
+        lines.append('{{EmbedInteractiveExample("pages/css/does-not-exist.html")}}')
+    lines.extend(["## Syntax", "", "```css", "a { color: red; }", "```", ""])
+    return "\n".join(lines)
+
+
+def generate(root, pages=1000, examples=50, density=0.8, seed=0):
+    # Writes root/content and root/interactive-examples, replacing them
+    rng = random.Random(seed)
+    for folder in ("content", "interactive-examples"):
+        shutil.rmtree(os.path.join(root, folder), ignore_errors=True)
+
+    interactive_examples = os.path.join(root, "interactive-examples")
+    built = generate_examples(interactive_examples, examples, rng)
+    built_paths = [path for paths in built.values() for path in paths]
+
+    content = os.path.join(root, "content", "files")
+    for i in range(pages):
+        locale = rng.choice(locales)
+        section = "mdn" if rng.random() < 0.01 else f"web/section-{i % 50}"
+        write(os.path.join(content, locale, section, f"page-{i}", "index.md"),
+              generate_page(rng, built_paths, density))
+    return os.path.join(root, "content"), interactive_examples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic content tree and interactive-examples.")
+    parser.add_argument("root")
+    parser.add_argument("--pages", type=int, default=1000, help="index.md files (default: %(default)s)")
+    parser.add_argument("--examples", type=int, default=50,
+                        help="examples per converter type (default: %(default)s)")
+    parser.add_argument("--density", type=float, default=0.8,
+                        help="average extra macros per page (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    content, interactive_examples = generate(args.root, args.pages, args.examples,
+                                             args.density, seed=args.seed)
+    print(f"{content}\n{interactive_examples}")
+
+
+if __name__ == "__main__":
+    main()
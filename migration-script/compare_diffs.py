@@ -0,0 +1,257 @@
+# Streaming replacement for `npm run emit_js_console_diffs`: reads the
+# compare-results.json written by the console comparisons in
+# compare-interactive-examples one result at a time, and writes the results
+# whose console output differs to compare-diffs.json, in the same format.
+# Run it from compare-interactive-examples:
+#
+#   python ../migration-script/compare_diffs.py emit [compare-results-from-diff.json]
+#   python ../migration-script/compare_diffs.py allow en-US/Web/API/Performance/now
+#
+# Console output is normalized as compare.js does, and timestamps and random
+# numbers are masked, before the old and new outputs are compared. Diffs
+# confirmed to be false positives are added to an allow-list with `allow`;
+# they are left out of compare-diffs.json, and so not fetched again, for as
+# long as both outputs stay the same.
+
+import argparse
+import json
+import re
+import sys
+
+from writer import open_atomic, write_atomic
+
+allow_list_version = 1
+chunk_size = 1 << 16
+
+# Examples with random elements, whose output differs on every run
+random_slugs = (
+    "Web/JavaScript/Reference/Global_Objects/Math/random",
+    "Web/JavaScript/Reference/Global_Objects/Promise/finally",
+)
+
+# Differences between the old and the new console, see massageOldOutput and
+# massageNewOutput in compare.js
+prompt_pattern = re.compile(r"^> +", re.MULTILINE)
+error_pattern = re.compile(r"^[A-Za-z]*Error:", re.MULTILINE)
+noise_patterns = [
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?"), "<date>"),
+    (re.compile(r"\b(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun) [A-Z][a-z]{2} \d{2} \d{4} "
+                r"\d{2}:\d{2}:\d{2} GMT[+-]\d{4}(?: \([^)\n]*\))?"), "<date>"),
+    # Date.now() and the like
+    (re.compile(r"\b1\d{12}\b"), "<timestamp>"),
+    # Math.random() and the like; shorter fractions are left alone
+    (re.compile(r"\b0\.\d{10,}"), "<random>"),
+]
+
+whitespace_pattern = re.compile(r"\s*")
+decoder = json.JSONDecoder()
+
+
+class StreamReader:
+    # Incremental reader for a JSON document, holding one value and a chunk of
+    # the file at a time.
+
+    def __init__(self, file):
+        self.file = file
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def fill(self):
+        chunk = self.file.read(chunk_size)
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        self.eof = not chunk
+        return not self.eof
+
+    def peek(self):
+        # Next character that isn't whitespace, or "" at the end
+        while True:
+            self.position = whitespace_pattern.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.fill():
+                return ""
+
+    def expect(self, characters):
+        character = self.peek()
+        if not character or character not in characters:
+            raise ValueError(f"Expected one of {characters!r} in {self.file.name}, "
+                             f"got {character or 'the end of the file'!r}")
+        self.position += 1
+        return character
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.position)
+                # A number near the end of the buffer may go on in the next
+                # chunk: raw_decode reads "4." as 4 and "4e+" as 4, leaving up
+                # to two characters. Containers and strings end with a delimiter.
+                if (self.eof or isinstance(value, (dict, list, str))
+                        or len(self.buffer) - end > 2):
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+
+def iter_results(file):
+    # (locale, result) for every result of a {locale: [result, ...]} file
+    reader = StreamReader(file)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        locale = reader.value()
+        reader.expect(":")
+        reader.expect("[")
+        if reader.peek() == "]":
+            reader.position += 1
+        else:
+            while True:
+                yield locale, reader.value()
+                if reader.expect(",]") == "]":
+                    break
+        if reader.expect(",}") == "}":
+            return
+
+
+def normalize_new_output(output):
+    output = error_pattern.sub("Error:", output or "")
+    for pattern, replacement in noise_patterns:
+        output = pattern.sub(replacement, output)
+    return output
+
+
+def normalize_old_output(output):
+    return normalize_new_output(prompt_pattern.sub("", output or ""))
+
+
+class AllowList:
+    def __init__(self, path, diffs):
+        self.path = path
+        # (locale, slug, old console, new console) of confirmed false positives
+        self.diffs = diffs
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return cls(path, set())
+        if data.get("version") != allow_list_version:
+            sys.exit(f"Unknown allow-list version in {path}")
+        return cls(path, {(diff["locale"], diff["slug"], diff["old"], diff["new"])
+                          for diff in data["diffs"]})
+
+    def allows(self, locale, slug, old_console, new_console):
+        if slug in random_slugs and old_console and new_console:
+            return True
+        return (locale, slug, old_console, new_console) in self.diffs
+
+    def add(self, diff):
+        self.diffs.add((diff["locale"], diff["slug"], diff["old"]["consoleResult"],
+                        diff["new"]["consoleResult"]))
+
+    def save(self):
+        diffs = [{"locale": locale, "slug": slug, "old": old_console, "new": new_console}
+                 for locale, slug, old_console, new_console in sorted(self.diffs)]
+        write_atomic(self.path, json.dumps({"version": allow_list_version, "diffs": diffs},
+                                           indent=2, ensure_ascii=False) + "\n")
+
+
+def result_diff(result):
+    # What compare-diffs.json lists for a result, or None if the outputs match
+    if "old" not in result or "new" not in result:
+        # The fetch failed; listed so it is fetched again
+        return {"slug": result["slug"], "locale": result["locale"],
+                "error": result.get("error")}
+    old_console = normalize_old_output(result["old"]["consoleResult"])
+    new_console = normalize_new_output(result["new"]["consoleResult"])
+    if old_console == new_console:
+        return None
+    return {
+        "slug": result["slug"],
+        "locale": result["locale"],
+        "old": {"url": result["old"]["url"], "consoleResult": old_console},
+        "new": {"url": result["new"]["url"], "consoleResult": new_console},
+    }
+
+
+def write_diff(out_file, diff, first):
+    # Laid out like JSON.stringify(diffs, null, 2)
+    text = json.dumps(diff, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+    out_file.write(("[\n  " if first else ",\n  ") + text)
+
+
+def emit(results_path, diffs_path, allow_list):
+    counts = {"results": 0, "diffs": 0, "allowed": 0, "errors": 0}
+    with open(results_path, "r", encoding="utf-8") as file, open_atomic(diffs_path) as out_file:
+        for locale, result in iter_results(file):
+            counts["results"] += 1
+            diff = result_diff(result)
+            if diff is None:
+                continue
+            if "error" in diff:
+                counts["errors"] += 1
+            elif allow_list.allows(diff["locale"], diff["slug"], diff["old"]["consoleResult"],
+                                   diff["new"]["consoleResult"]):
+                counts["allowed"] += 1
+                continue
+            write_diff(out_file, diff, counts["diffs"] == 0)
+            counts["diffs"] += 1
+        out_file.write("\n]" if counts["diffs"] else "[]")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff the console results of the old and new examples.")
+    parser.add_argument("--allow-list", default="compare-allow-list.json", metavar="PATH",
+                        help="confirmed false positives (default: %(default)s)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    emit_parser = subparsers.add_parser("emit", help="write the differing results to compare-diffs.json")
+    emit_parser.add_argument("results", nargs="?", default="compare-results.json",
+                             help="results of a fetch (default: %(default)s)")
+    emit_parser.add_argument("--output", default="compare-diffs.json", metavar="PATH",
+                             help="(default: %(default)s)")
+    allow_parser = subparsers.add_parser(
+        "allow", help="move diffs confirmed to be false positives to the allow-list")
+    allow_parser.add_argument("pages", nargs="*", metavar="LOCALE/SLUG",
+                              help="e.g. en-US/Web/API/Performance/now")
+    allow_parser.add_argument("--all", action="store_true", help="allow every diff left")
+    allow_parser.add_argument("--diffs", default="compare-diffs.json", metavar="PATH",
+                              help="(default: %(default)s)")
+    args = parser.parse_args()
+
+    allow_list = AllowList.load(args.allow_list)
+    if args.command == "emit":
+        counts = emit(args.results, args.output, allow_list)
+        print(f"Compared {counts['results']} results: {counts['diffs']} diffs "
+              f"({counts['errors']} failed fetches), {counts['allowed']} allowed; "
+              f"wrote {args.output}")
+        return
+
+    with open(args.diffs, "r", encoding="utf-8") as file:
+        diffs = json.load(file)
+    pages = set(args.pages)
+    kept = []
+    for diff in diffs:
+        if "error" not in diff and (args.all or f"{diff['locale']}/{diff['slug']}" in pages):
+            allow_list.add(diff)
+            pages.discard(f"{diff['locale']}/{diff['slug']}")
+        else:
+            kept.append(diff)
+    for page in sorted(pages):
+        print(f"Not in {args.diffs}: {page}")
+    allow_list.save()
+    write_atomic(args.diffs, json.dumps(kept, indent=2, ensure_ascii=False))
+    print(f"Allowed {len(diffs) - len(kept)} diffs, {len(kept)} left in {args.diffs}")
+
+
+if __name__ == "__main__":
+    main()
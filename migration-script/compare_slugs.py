@@ -0,0 +1,63 @@
+import json
+import os
+import re
+
+from slug_index import locale_of
+from writer import write_atomic
+
+# Slugs of the pages a migration changed, for the browser comparisons in
+# compare-interactive-examples. One compare-slugs-<type>.json per comparison,
+# in the {locale: [slug, ...]} format of compare-slugs.json, e.g.
+#
+#   npm run fetch_css_visual_results compare-slugs-css.json
+
+# Comparison a converter's pages belong to; css-tabbed examples are titled
+# "CSS Demo:" like the css ones.
+compare_types = {"css": "css", "css-tabbed": "css", "html": "html", "js": "js", "wat": "wat"}
+
+front_matter_pattern = re.compile(r"\A---\r?\n(.*?)^---", re.MULTILINE | re.DOTALL)
+slug_pattern = re.compile(r"""^slug:[ \t]*(["']?)(.*?)\1[ \t]*\r?$""", re.MULTILINE)
+
+
+def page_slug(content):
+    if match := front_matter_pattern.match(content):
+        if slug := slug_pattern.search(match.group(1)):
+            return slug.group(2)
+    return None
+
+
+def compare_locale(md_file):
+    # compare.js names en-US as such and translated locales by their folder
+    locale = locale_of(md_file)
+    return "en-US" if locale == "en-us" else locale
+
+
+class CompareSlugs:
+    def __init__(self):
+        # compare type -> locale -> slugs
+        self.slugs = {compare_type: {} for compare_type in sorted(set(compare_types.values()))}
+
+    def add(self, result):
+        # Pages are compared for every kind of example replaced on them
+        example_types = {compare_types[example_type]
+                         for (example_type, outcome), count in result.stats.items()
+                         if outcome == "replaced" and count}
+        if not example_types or result.updated_content is None:
+            return
+        slug = page_slug(result.content)
+        if slug is None:
+            print(f"No slug: {result.md_file}")
+            return
+        for compare_type in example_types:
+            self.slugs[compare_type].setdefault(compare_locale(result.md_file), set()).add(slug)
+
+    def save(self, folder):
+        os.makedirs(folder, exist_ok=True)
+        for compare_type, slugs in self.slugs.items():
+            data = {locale: sorted(locale_slugs) for locale, locale_slugs in sorted(slugs.items())}
+            write_atomic(os.path.join(folder, f"compare-slugs-{compare_type}.json"),
+                         json.dumps(data, indent=2) + "\n")
+
+    def count(self):
+        return sum(len(locale_slugs) for slugs in self.slugs.values()
+                   for locale_slugs in slugs.values())
@@ -0,0 +1,227 @@
+import re
+from collections import Counter
+
+from css_normalize import normalize_output_css
+from html_extract import extract_css_example
+from lib import map_media
+from meta_index import meta_digest, meta_key
+from preflight import plan_example
+from renderer import render_plan
+import instrument
+import sources
+from sources import add_dependency, load_source, read
+
+# Each converter turns one EmbedInteractiveExample macro into an
+# InteractiveExample macro followed by code fences. Converters return None to
+# keep the macro unchanged.
+
+macro_pattern = re.compile(
+    r'^{{EmbedInteractiveExample\("([^"]+)"([^}]*)\)}}(.*)$', re.MULTILINE)
+built_path_pattern = re.compile(r"^pages\/(css|js|tabbed|wat)\/(.*)$")
+
+
+# Normalizers run once per example source, their results are cached by
+# sources.load_source.
+
+
+def normalize_css_example_code(example_code):
+    css_choices, html_example_src = extract_css_example(example_code)
+    return (tuple(map_media(choice) for choice in css_choices),
+            map_media(html_example_src.strip()))
+
+
+def normalize_css_src(css_example_src):
+    if "url(" in css_example_src:
+        css_example_src = map_media(css_example_src)
+    return css_example_src
+
+
+def normalize_css_output_src(css_example_src):
+    return normalize_output_css(css_example_src)
+
+
+def normalize_html_example_code(example_code):
+    return map_media(example_code).replace("&amp;shy;", "&shy;")
+
+
+def normalize_html_object_example_code(example_code):
+    return normalize_html_example_code(example_code.replace(
+        'type="application/pdf" data="/media/examples/In-CC0.pdf"', 'type="video/mp4" data="/shared-assets/videos/flower.mp4"'))
+
+
+def load_optional(plan, key, normalize=read):
+    # Optional sources are only in plan.paths when the meta entry names them
+    path = plan.paths.get(key)
+    if path is None:
+        return None
+    return load_source(path, normalize)
+
+
+def convert_css(plan, other_args, suffix):
+    css_choices, html_example_src = load_source(plan.paths["exampleCode"],
+                                                normalize_css_example_code)
+    css_example_src = load_optional(plan, "cssExampleSrc", normalize_css_output_src)
+    js_example_src = load_optional(plan, "jsExampleSrc", map_media)
+
+    return render_plan(plan, other_args, suffix, choices=css_choices,
+                       html=html_example_src, css=css_example_src, js=js_example_src)
+
+
+def convert_js(plan, other_args, suffix):
+    code = load_source(plan.paths["exampleCode"])
+
+    return render_plan(plan, other_args, suffix, js=code)
+
+
+def convert_html(plan, other_args, suffix):
+    if plan.title == "HTML Demo: <object>":
+        example_code = load_source(plan.paths["exampleCode"],
+                                   normalize_html_object_example_code)
+    else:
+        example_code = load_source(plan.paths["exampleCode"],
+                                   normalize_html_example_code)
+    css_example_src = load_optional(plan, "cssExampleSrc", normalize_css_src)
+    js_example_src = load_optional(plan, "jsExampleSrc", map_media)
+
+    return render_plan(plan, other_args, suffix, html=example_code,
+                       css=css_example_src, js=js_example_src)
+
+
+def convert_wat(plan, other_args, suffix):
+    wat_code = load_source(plan.paths["watExampleCode"], map_media)
+    js_code = load_optional(plan, "jsExampleCode", map_media)
+
+    return render_plan(plan, other_args, suffix, wat=wat_code, js=js_code)
+
+
+def convert_css_tabbed(plan, other_args, suffix):
+    example_code_path = plan.paths["exampleCode"]
+    if 'css-examples' not in example_code_path:
+        return None  # ignore HTML examples
+
+    example_code = load_source(example_code_path, map_media)
+    css_example_src = load_optional(plan, "cssExampleSrc", normalize_css_src)
+    js_example_src = load_optional(plan, "jsExampleSrc", map_media)
+
+    return render_plan(plan, other_args, suffix, css=css_example_src,
+                       html=example_code, js=js_example_src)
+
+
+converters = {
+    "css": convert_css,
+    "js": convert_js,
+    "html": convert_html,
+    "wat": convert_wat,
+    "css-tabbed": convert_css_tabbed,
+}
+
+all_types = tuple(converters)
+
+
+def converter_type(built_type, filename, meta_index, types):
+    # pages/tabbed/ is shared by the html-examples and the tabbed css-examples;
+    # html-examples win when both are enabled, like running the html script
+    # before the css-tabbed one.
+    if built_type == "tabbed":
+        if "html" in types and ("css-tabbed" not in types or ("html", filename) in meta_index):
+            return "html"
+        if "css-tabbed" in types:
+            return "css-tabbed"
+        return None
+    if built_type in types:
+        return built_type
+    return None
+
+
+def macro_example(built_path, meta_index, types):
+    # (converter type, filename) of the index entry a macro converts with
+    if path_match := built_path_pattern.search(built_path):
+        filename = path_match.group(2)
+        example_type = converter_type(path_match.group(1), filename, meta_index, types)
+        if example_type is not None:
+            return example_type, filename
+    return None
+
+
+def record_meta_dependencies(example_type, filename, meta_index):
+    example_types = [example_type]
+    if example_type == "css-tabbed":
+        # css-tabbed is only used while html-examples has no such page
+        example_types.append("html")
+    for dependency_type in example_types:
+        add_dependency(meta_key(dependency_type, filename),
+                       meta_digest(meta_index.get((dependency_type, filename))))
+
+
+def find_macros(content):
+    # (built path, line number) of every EmbedInteractiveExample macro
+    macros = []
+    if "{{EmbedInteractiveExample" not in content:
+        return macros
+    offset, line = 0, 1
+    for match in macro_pattern.finditer(content):
+        line += content.count("\n", offset, match.start())
+        offset = match.start()
+        macros.append((match.group(1), line))
+    return macros
+
+
+# Replace the macro with actual code blocks
+
+
+def replace_macros(content, md_file, meta_index, interactive_examples_folder, types=all_types, log=print,
+                   stats=None, plans=None):
+    # stats, if given, is a Counter of (converter type, outcome) pairs with
+    # outcome one of "replaced", "kept", "missing meta" or "missing source".
+    # plans are the preflight.preflight plans of meta_index; entries without
+    # one are planned on the spot.
+    counts = Counter()
+
+    def replace_macro(match):
+        built_path = match.group(1)
+        if path_match := built_path_pattern.search(built_path):
+            filename = path_match.group(2)
+            example_type = converter_type(
+                path_match.group(1), filename, meta_index, types)
+            if example_type is None:
+                counts[(path_match.group(1), "kept")] += 1
+                return match.group(0)  # keep the macro unchanged
+
+            if sources.recorded_dependencies is not None:
+                record_meta_dependencies(example_type, filename, meta_index)
+
+            key = (example_type, filename)
+            try:
+                plan = plans.get(key) if plans is not None else None
+                if plan is None:
+                    plan = plan_example(example_type, meta_index[key], interactive_examples_folder)
+                if plan.missing:
+                    for path in plan.missing:
+                        add_dependency(path, None)
+                        log(f"Missing source: {path}")
+                    counts[(example_type, "missing source")] += 1
+                    return match.group(0)  # keep the macro unchanged
+
+                with instrument.stage(f"convert[{example_type}]", example=built_path):
+                    result = converters[example_type](plan,
+                                                      match.group(2).lstrip(",").strip(),
+                                                      match.group(3).strip())
+            except KeyError:
+                log(f"No such file: {filename}")
+                counts[(example_type, "missing meta")] += 1
+                return match.group(0)  # keep the macro unchanged
+
+            if result is None:
+                counts[(example_type, "kept")] += 1
+                return match.group(0)  # keep the macro unchanged
+            counts[(example_type, "replaced")] += 1
+            return result
+
+        return match.group(0)  # keep the macro unchanged
+
+    # Search for EmbedInteractiveExample macros and replace them
+    updated_content = macro_pattern.sub(replace_macro, content)
+
+    if stats is not None:
+        stats.update(counts)
+    return updated_content
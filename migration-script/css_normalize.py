@@ -0,0 +1,94 @@
+import re
+
+from lib import map_media
+
+# Single pass over the CSS of a css-examples page: on the live site it is
+# scoped to `#output` (or `.output`), in InteractiveExample blocks it applies
+# to the whole document. A selector that is just #output or .output becomes
+# `body` when it is the whole selector, and is dropped when it is followed by
+# a descendant selector. Media references are mapped in url() and string
+# tokens. Comments, strings and declarations are left alone otherwise.
+
+# Tokens that matter in blocks of style rules, and in declaration blocks
+rule_token_pattern = re.compile(r"""(?=[/"'u#.{}])(?:
+    (?P<comment>/\*.*?(?:\*/|\Z))
+  | (?P<string>"(?:[^"\\\n]|\\.)*"?|'(?:[^'\\\n]|\\.)*'?)
+  | (?P<url>url\([^"'()]*\))
+  | (?P<output>[#.]output(?![\w-])(?P<space>\s+)(?P<brace>\{)?)
+  | (?P<open>\{)
+  | (?P<close>\})
+)""", re.DOTALL | re.VERBOSE)
+declaration_token_pattern = re.compile(r"""(?=[/"'u{}])(?:
+    (?P<comment>/\*.*?(?:\*/|\Z))
+  | (?P<string>"(?:[^"\\\n]|\\.)*"?|'(?:[^'\\\n]|\\.)*'?)
+  | (?P<url>url\([^"'()]*\))
+  | (?P<open>\{)
+  | (?P<close>\})
+)""", re.DOTALL | re.VERBOSE)
+
+# At-rules whose blocks hold style rules rather than declarations
+group_at_rules = {"@media", "@supports", "@container", "@layer", "@document", "@scope",
+                  "@starting-style"}
+selector_boundaries = set(" \t\r\n\f,>+~{};/")
+
+
+def normalize_output_css(code, report=None):
+    if "output" not in code and "/media/" not in code:
+        return code
+
+    pieces = []
+    last = 0
+    # Whether each open block holds style rules; the top level does
+    rule_blocks = [True]
+    # Where the current block's content starts
+    block_start = 0
+    has_at_rules = "@" in code
+
+    def open_block(brace):
+        if not has_at_rules:
+            rule_blocks.append(False)
+            return brace + 1
+        # The prelude starts after the last statement or block of this level
+        prelude_start = max(block_start, code.rfind(";", block_start, brace) + 1,
+                            code.rfind("}", block_start, brace) + 1)
+        prelude = code[prelude_start:brace].lstrip()
+        if prelude.startswith("@"):
+            at_keyword = re.match(r"@[\w-]*", prelude).group(0).lower()
+            rule_blocks.append(at_keyword in group_at_rules)
+        else:
+            rule_blocks.append(False)
+        return brace + 1
+
+    position = 0
+    while match := (rule_token_pattern if rule_blocks[-1] else declaration_token_pattern).search(
+            code, position):
+        kind = match.lastgroup
+        start, position = match.span()
+        if kind in ("string", "url"):
+            token = match.group(0)
+            if "/media/" in token:
+                pieces.append(code[last:start])
+                pieces.append(map_media(token, report))
+                last = position
+        elif kind == "output":
+            if start and code[start - 1] not in selector_boundaries:
+                # Not a selector of its own, e.g. .x.output
+                if match.group("brace"):
+                    block_start = open_block(position - 1)
+                continue
+            pieces.append(code[last:start])
+            if match.group("brace"):
+                pieces.append("body" + match.group("space") + "{")
+                block_start = open_block(position - 1)
+            last = position
+        elif kind == "open":
+            block_start = open_block(start)
+        elif kind == "close":
+            if len(rule_blocks) > 1:
+                rule_blocks.pop()
+            block_start = position
+
+    if not pieces:
+        return code
+    pieces.append(code[last:])
+    return "".join(pieces)
@@ -0,0 +1,100 @@
+import json
+import os
+import subprocess
+import sys
+
+from meta_index import built_path, index_entries, meta_digest
+from slug_index import slugs_for_example
+from walker import excluded_folders
+
+# Pages to migrate after a content rebase or an interactive-examples update,
+# from `git diff --name-only` over a revision range of each checkout: the
+# index.md files changed in content, and the examples whose sources or
+# meta.json entries changed in interactive-examples. Ranges are anything git
+# diff takes as one argument: A..B, A...B, or a single revision to compare
+# with the working tree.
+
+
+def git(repo, *args):
+    process = subprocess.run(["git", "-C", repo, *args], capture_output=True, encoding="utf-8")
+    if process.returncode != 0:
+        sys.exit(f"git {' '.join(args)} failed in {repo}: {process.stderr.strip()}")
+    return process.stdout
+
+
+def changed_paths(repo, revisions, deleted=True):
+    # Changed files as paths relative to repo, which may be below the top level
+    top_level = git(repo, "rev-parse", "--show-toplevel").strip()
+    filters = [] if deleted else ["--diff-filter=d"]
+    output = git(repo, "diff", "--name-only", "-z", *filters, revisions, "--")
+    repo_path = os.path.realpath(repo)
+    return [os.path.relpath(os.path.join(top_level, path), repo_path)
+            for path in output.split("\0") if path]
+
+
+def revision_sides(repo, revisions):
+    # (base, head) revisions of a range; head is None for the working tree
+    if "..." in revisions:
+        left, right = revisions.split("...", 1)
+        left, right = left or "HEAD", right or "HEAD"
+        return git(repo, "merge-base", left, right).strip(), right
+    if ".." in revisions:
+        left, right = revisions.split("..", 1)
+        return left or "HEAD", right or "HEAD"
+    return revisions, None
+
+
+def show(repo, revision, path):
+    # Text of path at revision, or of the working tree file; None if missing
+    if revision is None:
+        try:
+            with open(os.path.join(repo, path), "r", encoding="utf-8") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+    process = subprocess.run(["git", "-C", repo, "show", f"{revision}:./{path}"],
+                             capture_output=True, encoding="utf-8")
+    return process.stdout if process.returncode == 0 else None
+
+
+def changed_pages(content_folder, revisions):
+    # index.md files changed in the range and still there, as paths under
+    # content_folder, without the ones find_index_files leaves out
+    pages = set()
+    for path in changed_paths(content_folder, revisions, deleted=False):
+        parts = path.split(os.sep)
+        if (parts[0] == "files" and parts[-1] == "index.md"
+                and not any(part in excluded_folders for part in parts[1:-1])):
+            pages.add(os.path.normpath(os.path.join(content_folder, path)))
+    return pages
+
+
+def changed_meta_entries(interactive_examples_folder, path, base, head):
+    # Built paths of the entries of a meta.json that differ between base and
+    # head, including added and removed ones
+    examples_dir = path.split(os.sep)[1]
+    entries = []
+    for revision in (base, head):
+        text = show(interactive_examples_folder, revision, path)
+        try:
+            data = json.loads(text) if text is not None else {"pages": {}}
+            entries.append(dict(index_entries(examples_dir, data)))
+        except (ValueError, KeyError):
+            # Not a valid meta.json on one side: every entry of the other
+            entries.append({})
+    old, new = entries
+    return {built_path(*key) for key in old.keys() | new.keys()
+            if meta_digest(old.get(key)) != meta_digest(new.get(key))}
+
+
+def changed_examples(interactive_examples_folder, revisions, meta_files):
+    # Built paths of the examples changed in the range
+    base, head = revision_sides(interactive_examples_folder, revisions)
+    slugs = set()
+    for path in changed_paths(interactive_examples_folder, revisions):
+        parts = path.split(os.sep)
+        if parts[0] == "live-examples" and parts[-1] == "meta.json" and len(parts) > 2:
+            slugs.update(changed_meta_entries(interactive_examples_folder, path, base, head))
+        else:
+            slugs.update(slugs_for_example(path, interactive_examples_folder, meta_files))
+    return slugs
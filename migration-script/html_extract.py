@@ -0,0 +1,228 @@
+import re
+from html.parser import HTMLParser
+
+import instrument
+
+# Pulls the `code.language-css` choices and the inner HTML of `#output` out of
+# a css-examples page, producing exactly what BeautifulSoup's html.parser tree
+# gives for `get_text(strip=True)` and `decode_contents()`.
+#
+# BeautifulSoup tokenizes with the same HTMLParser, so the fast path only has
+# to replay its serialization rules: attributes sorted and minimally escaped,
+# void elements written as `<br/>`, whitespace-only text collapsed outside
+# <pre>, and end tags closing everything up to the last matching open element.
+# Markup it stores as special strings (doctypes, CDATA), uncommon entity
+# references and attribute values it splits and re-joins make the fast path
+# give up, and the example is parsed with BeautifulSoup instead.
+
+void_elements = {
+    "area", "base", "basefont", "bgsound", "br", "col", "command", "embed",
+    "frame", "hr", "image", "img", "input", "isindex", "keygen", "link",
+    "menuitem", "meta", "nextid", "param", "source", "spacer", "track", "wbr",
+}
+# Attributes BeautifulSoup stores as whitespace-separated lists on some tags.
+list_attributes = {
+    "class", "dropzone", "accesskey", "rev", "rel", "headers",
+    "accept-charset", "archive", "sizes", "sandbox", "for",
+}
+# Tags whose text BeautifulSoup stores as special string types.
+special_string_tags = {"script", "style", "template", "rt", "rp"}
+unescaped_text_tags = {"script", "style"}
+preserve_whitespace_tags = {"pre", "textarea"}
+ascii_spaces = "\x20\x0a\x09\x0c\x0d"
+simple_entities = {
+    "amp": "&", "lt": "<", "gt": ">", "quot": '"', "apos": "'", "nbsp": "\xa0",
+    "shy": "\xad", "copy": "\xa9", "mdash": "\u2014", "ndash": "\u2013",
+}
+
+escape_pattern = re.compile(r"[&<>]")
+escapes = {"&": "&amp;", "<": "&lt;", ">": "&gt;"}
+
+
+class Unsupported(Exception):
+    pass
+
+
+def escape(text):
+    return escape_pattern.sub(lambda match: escapes[match.group(0)], text)
+
+
+def format_attributes(attrs):
+    values = {}
+    for key, value in attrs:
+        values[key] = "" if value is None else value
+
+    pieces = []
+    for key, value in sorted(values.items()):
+        if key in list_attributes and value != " ".join(value.split()):
+            raise Unsupported(f"list attribute {key}")
+        value = escape(value)
+        if '"' not in value:
+            pieces.append(f' {key}="{value}"')
+        elif "'" not in value:
+            pieces.append(f" {key}='{value}'")
+        else:
+            pieces.append(f' {key}="{value.replace(chr(34), "&quot;")}"')
+    return "".join(pieces)
+
+
+class CssExampleParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        # Open elements, popped the way BeautifulSoup pops its tag stack
+        self.stack = []
+        # Void elements opened without `/>`; their end tags are swallowed
+        # without even ending the current text node
+        self.already_closed = []
+        self.text = []
+        self.css_choices = []
+        self.output = None
+        # Stack depths of #output and of the current code.language-css, None
+        # outside of them
+        self.output_depth = None
+        self.code_depth = None
+
+    def in_region(self):
+        return self.output_depth is not None or self.code_depth is not None
+
+    def end_data(self):
+        if not self.text:
+            return
+        text = "".join(self.text)
+        self.text = []
+
+        if self.output_depth is not None:
+            output_text = text
+            if not any(tag in preserve_whitespace_tags for tag in self.stack):
+                if not text.strip(ascii_spaces):
+                    output_text = "\n" if "\n" in text else " "
+            if self.stack[-1] not in unescaped_text_tags:
+                output_text = escape(output_text)
+            self.output.append(output_text)
+
+        # get_text() skips the special string types
+        if self.code_depth is not None and text.strip():
+            if not any(tag in special_string_tags for tag in self.stack):
+                self.css_choices[-1].append(text.strip())
+
+    def push(self, tag, attrs):
+        if self.output_depth is not None:
+            self.output.append(f"<{tag}{format_attributes(attrs)}")
+            self.output.append("/>" if tag in void_elements else ">")
+
+        self.stack.append(tag)
+
+        attributes = dict(attrs)
+        is_output = self.output is None and attributes.get("id") == "output"
+        is_code = tag == "code" and "language-css" in (attributes.get("class") or "").split()
+        if (is_output or is_code) and self.in_region():
+            raise Unsupported("nested extracted elements")
+        if is_output:
+            self.output = []
+            self.output_depth = len(self.stack)
+        if is_code:
+            self.css_choices.append([])
+            self.code_depth = len(self.stack)
+
+    def pop(self):
+        depth = len(self.stack)
+        tag = self.stack.pop()
+        if depth == self.output_depth:
+            self.output_depth = None
+        elif self.output_depth is not None and tag not in void_elements:
+            self.output.append(f"</{tag}>")
+        if depth == self.code_depth:
+            self.code_depth = None
+
+    def handle_starttag(self, tag, attrs):
+        self.end_data()
+        self.push(tag, attrs)
+        if tag in void_elements:
+            self.pop()
+            self.already_closed.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.end_data()
+        self.push(tag, attrs)
+        self.pop()
+
+    def handle_endtag(self, tag):
+        if tag in self.already_closed:
+            self.already_closed.remove(tag)
+            return
+        self.end_data()
+        # End tags without an open element are dropped
+        if tag not in self.stack:
+            return
+        while self.stack[-1] != tag:
+            self.pop()
+        self.pop()
+
+    def handle_data(self, data):
+        if self.in_region():
+            self.text.append(data)
+
+    def handle_comment(self, data):
+        self.end_data()
+        if self.output_depth is not None:
+            self.output.append(f"<!--{data}-->")
+
+    def handle_entityref(self, name):
+        if self.in_region():
+            if name not in simple_entities:
+                raise Unsupported(f"entity {name}")
+            self.text.append(simple_entities[name])
+
+    def handle_charref(self, name):
+        if self.in_region():
+            try:
+                codepoint = int(name[1:], 16) if name[:1] in "xX" else int(name)
+            except ValueError:
+                raise Unsupported(f"character reference {name}")
+            # Leave control characters, surrogates and the windows-1252
+            # remapping of 128-159 to BeautifulSoup
+            if not (32 <= codepoint < 127 or 160 <= codepoint < 0xd800):
+                raise Unsupported(f"character reference {name}")
+            self.text.append(chr(codepoint))
+
+    def unsupported_in_region(self, *args):
+        if self.in_region():
+            raise Unsupported("markup BeautifulSoup treats specially")
+
+    handle_decl = handle_pi = unknown_decl = unsupported_in_region
+
+
+def extract_css_example_fast(example_code):
+    parser = CssExampleParser()
+    try:
+        parser.feed(example_code)
+        parser.close()
+        parser.end_data()
+        # BeautifulSoup closes whatever is still open at the end of the document
+        while parser.stack:
+            parser.pop()
+    except (Unsupported, AssertionError):
+        return None
+    if parser.output is None:
+        return None
+    return (tuple("".join(choice) for choice in parser.css_choices),
+            "".join(parser.output))
+
+
+def extract_css_example_soup(example_code):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(example_code, 'html.parser')
+    css_choices = tuple(code.get_text(strip=True)
+                        for code in soup.find_all('code', class_='language-css'))
+    return css_choices, soup.find(id='output').decode_contents()
+
+
+def extract_css_example(example_code):
+    # Returns the css choices and the inner HTML of #output
+    with instrument.stage("extract_css_example"):
+        result = extract_css_example_fast(example_code)
+    if result is None:
+        with instrument.stage("extract_css_example[beautifulsoup]"):
+            result = extract_css_example_soup(example_code)
+    return result
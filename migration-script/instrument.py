@@ -0,0 +1,117 @@
+import contextlib
+import heapq
+import time
+import tracemalloc
+
+# Opt-in profiling of a migration run (`migrate.py --profile report.json`).
+# Code paths wrap their work in `stage(name)`; while no profile is active this
+# is a shared no-op context manager. Stage times are wall times, both
+# inclusive and excluding nested stages ("self"). Each worker process keeps
+# its own profile and hands it to the parent with every chunk.
+
+profile = None
+no_stage = contextlib.nullcontext()
+
+
+class Profile:
+    def __init__(self, top=10, memory=False):
+        self.top = top
+        self.memory = memory
+        # stage name -> [calls, seconds, self seconds]
+        self.stages = {}
+        # The `top` slowest files as a min-heap of (seconds, md_file)
+        self.files = []
+        # example -> [calls, seconds]
+        self.examples = {}
+        self.peak_memory = 0
+        self.worker_peak_memory = None
+        # Time spent in nested stages, per open stage
+        self.nested = [0.0]
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def stage(self, name, md_file=None, example=None):
+        self.nested.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self.nested.pop()
+            self.nested[-1] += elapsed
+
+            entry = self.stages.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] += elapsed - nested
+            if md_file is not None:
+                self.add_file(md_file, elapsed)
+            if example is not None:
+                entry = self.examples.setdefault(example, [0, 0.0])
+                entry[0] += 1
+                entry[1] += elapsed
+
+    def add_file(self, md_file, seconds):
+        if len(self.files) < self.top:
+            heapq.heappush(self.files, (seconds, md_file))
+        elif seconds > self.files[0][0]:
+            heapq.heapreplace(self.files, (seconds, md_file))
+
+    def take(self):
+        # Hands over everything recorded so far, e.g. from a worker process
+        if self.memory:
+            self.peak_memory = max(self.peak_memory, tracemalloc.get_traced_memory()[1])
+        taken = (self.stages, self.files, self.examples, self.peak_memory)
+        self.stages, self.files, self.examples = {}, [], {}
+        return taken
+
+    def merge(self, taken):
+        stages, files, examples, peak_memory = taken
+        for name, (calls, seconds, self_seconds) in stages.items():
+            entry = self.stages.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += calls
+            entry[1] += seconds
+            entry[2] += self_seconds
+        for seconds, md_file in files:
+            self.add_file(md_file, seconds)
+        for example, (calls, seconds) in examples.items():
+            entry = self.examples.setdefault(example, [0, 0.0])
+            entry[0] += calls
+            entry[1] += seconds
+        self.worker_peak_memory = max(self.worker_peak_memory or 0, peak_memory)
+
+    def as_dict(self, wall_seconds):
+        if self.memory:
+            self.peak_memory = max(self.peak_memory, tracemalloc.get_traced_memory()[1])
+        slowest_examples = heapq.nlargest(self.top, self.examples.items(),
+                                          key=lambda item: item[1][1])
+        return {
+            "wall_seconds": round(wall_seconds, 6),
+            "stages": {
+                name: {"calls": calls, "seconds": round(seconds, 6),
+                       "self_seconds": round(self_seconds, 6)}
+                for name, (calls, seconds, self_seconds)
+                in sorted(self.stages.items(), key=lambda item: -item[1][1])
+            },
+            "slowest_files": [{"path": md_file, "seconds": round(seconds, 6)}
+                              for seconds, md_file in sorted(self.files, reverse=True)],
+            "slowest_examples": [{"example": example, "calls": calls, "seconds": round(seconds, 6)}
+                                 for example, (calls, seconds) in slowest_examples],
+            "peak_memory_bytes": {
+                "main": self.peak_memory,
+                "workers": self.worker_peak_memory,
+            } if self.memory else None,
+        }
+
+
+def start(top=10, memory=False):
+    global profile
+    profile = Profile(top, memory)
+    return profile
+
+
+def stage(name, md_file=None, example=None):
+    if profile is None:
+        return no_stage
+    return profile.stage(name, md_file, example)
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+
+from meta_index import cache_file, meta_digest
+from sources import file_digest
+from writer import write_atomic
+
+# Manifest for the incremental mode: for every index.md, the stat and hash of
+# the file as the last run left it, plus the hash of every example source and
+# meta entry its macros used. A file is migrated again only if it or one of
+# those dependencies changed.
+#
+# Entries are appended to a journal as files are processed, so an interrupted
+# run resumes where it stopped. The journal is compacted at the end of a run.
+
+manifest_version = 1
+
+
+def default_manifest_path(content_folder):
+    return cache_file("manifest", content_folder, "jsonl")
+
+
+def content_digest(content):
+    if isinstance(content, bytes):
+        # Undecoded file contents, hashed as reading them in text mode would
+        # give them: utf-8 with universal newlines
+        return hashlib.sha1(content.replace(b"\r\n", b"\n").replace(b"\r", b"\n")).hexdigest()
+    return hashlib.sha1(content.encode()).hexdigest()
+
+
+class Manifest:
+    def __init__(self, path, config, entries):
+        self.path = path
+        self.config = config
+        self.entries = entries
+        self.journal = None
+
+    @classmethod
+    def load(cls, path, config):
+        entries = {}
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                header = json.loads(next(file, "null"))
+                if header == {"version": manifest_version, "config": config}:
+                    for line in file:
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            break  # torn write from an interrupted run
+                        entries[entry.pop("path")] = entry
+        except (OSError, json.JSONDecodeError):
+            pass
+        return cls(path, config, entries)
+
+    def open_journal(self):
+        # Start from a compacted copy so the journal only holds live entries
+        self.compact()
+        self.journal = open(self.path, "a")
+
+    def append(self, md_file, entry):
+        self.entries[md_file] = entry
+        if self.journal:
+            self.journal.write(json.dumps({"path": md_file, **entry}) + "\n")
+
+    def record(self, md_file, signature, digest, dependencies):
+        self.append(md_file, {"signature": signature, "hash": digest,
+                              "dependencies": dependencies})
+
+    def update_signature(self, md_file):
+        entry = self.entries.get(md_file)
+        if entry is not None:
+            stat = os.stat(md_file)
+            self.append(md_file, {**entry, "signature": [stat.st_mtime_ns, stat.st_size]})
+
+    def is_fresh(self, md_file, dependency_digest):
+        entry = self.entries.get(md_file)
+        if entry is None:
+            return False
+
+        try:
+            stat = os.stat(md_file)
+        except FileNotFoundError:
+            return False
+        if entry["signature"] != [stat.st_mtime_ns, stat.st_size]:
+            # Touched, e.g. by a checkout; only the content matters
+            with open(md_file, "r", encoding="utf-8") as file:
+                if content_digest(file.read()) != entry["hash"]:
+                    return False
+            self.update_signature(md_file)
+
+        return all(dependency_digest(key) == digest
+                   for key, digest in entry["dependencies"].items())
+
+    def compact(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        lines = [json.dumps({"version": manifest_version, "config": self.config})]
+        lines.extend(json.dumps({"path": md_file, **entry})
+                     for md_file, entry in sorted(self.entries.items())
+                     if os.path.exists(md_file))
+        write_atomic(self.path, "\n".join(lines) + "\n")
+
+    def close(self):
+        if self.journal:
+            self.journal.close()
+            self.journal = None
+        self.compact()
+
+
+def dependency_digests(meta_index):
+    # Current hashes of manifest dependencies, memoized for one run
+    digests = {}
+
+    def dependency_digest(key):
+        if key not in digests:
+            if key.startswith("meta:"):
+                example_type, filename = key[len("meta:"):].split("/", 1)
+                digests[key] = meta_digest(meta_index.get((example_type, filename)))
+            else:
+                digests[key] = file_digest(key)
+        return digests[key]
+
+    return dependency_digest
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import pickle
+
+from writer import write_atomic
+
+# Index of every example page in interactive-examples, keyed by
+# (converter type, fileName). Parsed meta.json files are cached on disk and
+# only re-read when their mtime or size changes.
+
+css_blocklist = [
+]
+
+css_tabbed_blocklist = [
+]
+
+built_types = {"css": "css", "js": "js", "html": "tabbed", "wat": "wat", "css-tabbed": "tabbed"}
+source_keys = ("exampleCode", "cssExampleSrc", "jsExampleSrc", "watExampleCode", "jsExampleCode")
+
+cache_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+cache_version = 1
+
+
+def cache_file(kind, folder, extension):
+    # One cache file of each kind per checkout, e.g. .cache/manifest-<key>.jsonl
+    key = hashlib.sha1(os.path.abspath(folder).encode()).hexdigest()[:12]
+    return os.path.join(cache_folder, f"{kind}-{key}.{extension}")
+
+
+def index_entries(examples_dir, data):
+    entries = []
+    for value in data["pages"].values():
+        if examples_dir == "css-examples" and value["type"] == "css" and value["fileName"] not in css_blocklist:
+            entries.append((("css", value["fileName"]), value))
+        elif examples_dir == "js-examples":
+            entries.append((("js", value["fileName"]), value))
+        elif examples_dir == "html-examples":
+            entries.append((("html", value["fileName"]), value))
+        elif examples_dir == "wat-examples":
+            entries.append((("wat", value["fileName"]), value))
+        if value["type"] == "tabbed" and value["fileName"] not in css_tabbed_blocklist:
+            entries.append((("css-tabbed", value["fileName"]), value))
+    return entries
+
+
+def built_path(example_type, filename):
+    # The path EmbedInteractiveExample macros use for an index entry
+    return f"pages/{built_types[example_type]}/{filename}"
+
+
+def example_sources(meta):
+    return [meta[key] for key in source_keys if key in meta]
+
+
+def meta_key(example_type, filename):
+    return f"meta:{example_type}/{filename}"
+
+
+def meta_digest(meta):
+    if meta is None:
+        return None
+    return hashlib.sha1(json.dumps(meta, sort_keys=True).encode()).hexdigest()
+
+
+def find_meta_files(live_examples_folder):
+    for dirpath, dirnames, filenames in os.walk(live_examples_folder):
+        dirnames.sort()
+        if "meta.json" in filenames:
+            yield os.path.join(dirpath, "meta.json")
+
+
+def cache_path(interactive_examples_folder):
+    return cache_file("meta-index", interactive_examples_folder, "pickle")
+
+
+def load_cache(path):
+    try:
+        with open(path, "rb") as file:
+            cache = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return {}
+    if cache.get("version") != cache_version:
+        return {}
+    return cache["files"]
+
+
+def save_cache(path, files):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_atomic(path, pickle.dumps({"version": cache_version, "files": files},
+                                    protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def load_meta_files(interactive_examples_folder, use_cache=True):
+    # Index entries per meta.json, keyed by its path relative to live-examples
+    live_examples_folder = os.path.join(interactive_examples_folder, "live-examples")
+    path = cache_path(interactive_examples_folder)
+    cached_files = load_cache(path) if use_cache else {}
+
+    files = {}
+    changed = False
+    for meta_file in find_meta_files(live_examples_folder):
+        relative_path = os.path.relpath(meta_file, live_examples_folder)
+        stat = os.stat(meta_file)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        cached = cached_files.get(relative_path)
+        if cached and cached[0] == signature:
+            files[relative_path] = cached
+            continue
+
+        with open(meta_file, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        examples_dir = relative_path.split(os.sep)[0]
+        files[relative_path] = (signature, index_entries(examples_dir, data))
+        changed = True
+
+    # Without any misses, a shorter file list means meta.json files were removed
+    changed = changed or len(files) != len(cached_files)
+    if use_cache and changed:
+        save_cache(path, files)
+
+    return {relative_path: entries for relative_path, (signature, entries) in files.items()}
+
+
+def merge_meta_files(files):
+    # One index from the entries of every meta.json, see load_meta_files
+    meta_index = {}
+    for relative_path in sorted(files):
+        meta_index.update(files[relative_path])
+    return meta_index
+
+
+def load_meta_index(interactive_examples_folder, use_cache=True):
+    return merge_meta_files(load_meta_files(interactive_examples_folder, use_cache))
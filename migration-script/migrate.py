@@ -0,0 +1,284 @@
+# copy the migration-script folder next to content or translated-content and
+# run from its root, e.g. `python ../migration-script/migrate.py`, or migrate
+# several checkouts at once:
+#
+#   python migrate.py --content ../content ../translated-content -j 8
+#
+# Walks the content tree once and converts every EmbedInteractiveExample macro
+# with the converter matching its `pages/<type>/` prefix.
+
+import argparse
+import difflib
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+import instrument
+from compare_slugs import CompareSlugs
+from git_changes import changed_examples, changed_pages
+from converters import all_types
+from lib import media_map, media_report
+from manifest import Manifest, default_manifest_path, dependency_digests
+from meta_index import load_meta_files, load_meta_index, meta_digest
+from migration import iter_migrations, prefetch_threads, prefilter_report
+from preflight import broken_references, preflight
+from slug_index import SlugIndex, default_index_path, slugs_for_example
+from walker import ListingCache, default_listing_cache_path, find_index_files
+from writer import BatchedWriter
+
+stat_outcomes = ("replaced", "kept", "missing meta", "missing source")
+
+
+def parse_args(argv=None, types=all_types):
+    parser = argparse.ArgumentParser(
+        description="Replace EmbedInteractiveExample macros with InteractiveExample code blocks.")
+    parser.add_argument("--content", nargs="+", default=["."],
+                        help="roots of content and/or translated-content (default: %(default)s)")
+    parser.add_argument("--interactive-examples", default="../interactive-examples",
+                        help="interactive-examples checkout (default: %(default)s)")
+    parser.add_argument("--locale", nargs="+", metavar="LOCALE",
+                        help="only migrate these locales, e.g. en-us fr (default: all)")
+    parser.add_argument("--listing-cache", action="store_true",
+                        help="cache directory listings of the content tree by directory mtime")
+    parser.add_argument("--types", nargs="+", choices=all_types, default=list(types),
+                        help="converters to run (default: all)")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="number of worker processes (default: %(default)s)")
+    parser.add_argument("--prefetch-threads", type=int, default=prefetch_threads, metavar="N",
+                        help="threads per process reading pages and example sources ahead, "
+                             "0 to read them when needed (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="rebuild the meta.json index without reading or writing its cache")
+    parser.add_argument("--media-report", metavar="PATH",
+                        help="write unmapped media references, with the number of sources "
+                             "using each, to this JSON file")
+    parser.add_argument("--incremental", action="store_true",
+                        help="skip files that, like the examples they embed, are unchanged since the last incremental run")
+    parser.add_argument("--manifest", metavar="PATH",
+                        help="manifest for --incremental (default: one per content root under .cache)")
+    parser.add_argument("--slug-index", metavar="PATH",
+                        help="example -> pages index kept up to date by every run "
+                             "(default: one per content root under .cache)")
+    parser.add_argument("--changed-example", action="append", metavar="PATH",
+                        help="only migrate pages embedding this example, given as a file under "
+                             "interactive-examples or as pages/<type>/<fileName>; repeatable")
+    parser.add_argument("--content-revisions", nargs="+", metavar="RANGE",
+                        help="only migrate index.md files changed in this git revision range, "
+                             "e.g. A..B, one per --content root; combines with the other filters")
+    parser.add_argument("--examples-revisions", metavar="RANGE",
+                        help="only migrate pages embedding examples whose sources or meta.json "
+                             "entries changed in this interactive-examples revision range")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="write per-stage timings and the slowest files and examples to this JSON file")
+    parser.add_argument("--profile-top", type=int, default=10, metavar="N",
+                        help="number of slowest files and examples in the profile (default: %(default)s)")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="also record tracemalloc peaks in the profile (slower)")
+    parser.add_argument("--compare-slugs", metavar="FOLDER",
+                        help="write compare-slugs-<type>.json files listing the changed pages, "
+                             "for the fetch scripts of compare-interactive-examples")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="print a unified diff of every change and per-converter statistics "
+                             "instead of writing files")
+    return parser.parse_args(argv)
+
+
+def print_diff(md_file, content, updated_content):
+    lines = difflib.unified_diff(content.splitlines(keepends=True),
+                                 updated_content.splitlines(keepends=True),
+                                 fromfile=f"a/{os.path.normpath(md_file)}",
+                                 tofile=f"b/{os.path.normpath(md_file)}")
+    for line in lines:
+        sys.stdout.write(line if line.endswith("\n") else line + "\n\\ No newline at end of file\n")
+
+
+def print_stats(stats):
+    converter_types = sorted({example_type for example_type, outcome in stats})
+    print(f"{'converter':<12}" + "".join(f"{outcome:>15}" for outcome in stat_outcomes))
+    for example_type in converter_types:
+        print(f"{example_type:<12}"
+              + "".join(f"{stats[(example_type, outcome)]:>15}" for outcome in stat_outcomes))
+
+
+class ContentRoot:
+    # One content or translated-content checkout, with its own example index
+    # and manifest.
+
+    def __init__(self, folder, slug_index_path=None, manifest_path=None, locales=None,
+                 use_listing_cache=False):
+        self.folder = folder
+        self.slug_index_path = slug_index_path or default_index_path(folder)
+        self.manifest_path = manifest_path or default_manifest_path(folder)
+        self.slug_index = SlugIndex.load(self.slug_index_path, folder)
+        self.manifest = None
+        self.written_files = []
+        self.changed_files = 0
+
+        # Get all index.md files recursively, in sorted order so logs are
+        # stable between runs
+        listing_cache = ListingCache.load(default_listing_cache_path(folder)) if use_listing_cache else None
+        with instrument.stage("walk"):
+            self.md_files = list(find_index_files(folder, locales, listing_cache))
+        if listing_cache:
+            listing_cache.save()
+        self.total_files = len(self.md_files)
+
+    def pages_embedding(self, slugs):
+        if not self.slug_index.pages:
+            print("The example index is empty, run slug_index.py build or a full migration first")
+        return {os.path.normpath(md_file) for md_file in self.slug_index.pages_embedding(slugs)}
+
+    def only_pages(self, pages):
+        # pages are normalized paths
+        self.md_files = [md_file for md_file in self.md_files
+                         if os.path.normpath(md_file) in pages]
+        self.total_files = len(self.md_files)
+
+    def skip_fresh(self, config, dependency_digest):
+        with instrument.stage("manifest"):
+            self.manifest = Manifest.load(self.manifest_path, config)
+            self.md_files = [md_file for md_file in self.md_files
+                             if not self.manifest.is_fresh(md_file, dependency_digest)]
+        print(f"Incremental: {self.total_files - len(self.md_files)} unchanged files skipped")
+
+    def finish(self, dry_run):
+        if self.manifest and not dry_run:
+            with instrument.stage("manifest"):
+                for md_file in self.written_files:
+                    self.manifest.update_signature(md_file)
+                self.manifest.close()
+        if not dry_run:
+            with instrument.stage("slug_index"):
+                self.slug_index.save()
+
+
+def main(argv=None, types=all_types):
+    args = parse_args(argv, types)
+    start_time = time.perf_counter()
+    if args.profile:
+        instrument.start(args.profile_top, args.profile_memory)
+    folders = list(dict.fromkeys(args.content))
+    if len(folders) > 1 and (args.slug_index or args.manifest):
+        sys.exit("--slug-index and --manifest can only be given for a single --content root")
+    if args.content_revisions and len(args.content_revisions) != len(folders):
+        sys.exit("--content-revisions takes one revision range per --content root")
+
+    with instrument.stage("meta_index"):
+        meta_index = load_meta_index(args.interactive_examples, use_cache=not args.no_cache)
+    # Every source the meta index references is looked up before any page is
+    # read, so broken references show up first
+    with instrument.stage("preflight"):
+        plans = preflight(meta_index, args.interactive_examples, args.types)
+    for example, path in broken_references(plans):
+        print(f"Broken reference: {example} -> {path}")
+
+    roots = [ContentRoot(folder, args.slug_index, args.manifest, args.locale, args.listing_cache)
+             for folder in folders]
+    # Candidate pages from changed examples and revision ranges; the other
+    # pages are left alone
+    if args.changed_example or args.content_revisions or args.examples_revisions:
+        with instrument.stage("changes"):
+            meta_files = load_meta_files(args.interactive_examples, use_cache=not args.no_cache)
+            slugs = set()
+            for example in args.changed_example or []:
+                slugs.update(slugs_for_example(example, args.interactive_examples, meta_files))
+            if args.examples_revisions:
+                slugs.update(changed_examples(args.interactive_examples, args.examples_revisions,
+                                              meta_files))
+            for index, root in enumerate(roots):
+                pages = root.pages_embedding(slugs) if slugs or args.examples_revisions else set()
+                if args.content_revisions:
+                    pages.update(changed_pages(root.folder, args.content_revisions[index]))
+                root.only_pages(pages)
+
+    if args.incremental:
+        config = {
+            "interactive_examples": os.path.abspath(args.interactive_examples),
+            "types": sorted(args.types),
+            "media_map": meta_digest(media_map),
+        }
+        dependency_digest = dependency_digests(meta_index)
+        for root in roots:
+            root.skip_fresh(config, dependency_digest)
+            if not args.dry_run:
+                root.manifest.open_journal()
+
+    # Files of every root go through the same workers, so the meta index is
+    # sent once and example sources are read once for all of them.
+    md_files = []
+    root_of = {}
+    for root in roots:
+        md_files.extend(root.md_files)
+        root_of.update(dict.fromkeys(root.md_files, root))
+
+    results = iter_migrations(interactive_examples_folder=args.interactive_examples,
+                              types=args.types, jobs=args.jobs, md_files=md_files,
+                              meta_index=meta_index, incremental=args.incremental,
+                              plans=plans, threads=args.prefetch_threads)
+
+    # Process each index.md file
+    stats = Counter()
+    compare_slugs = CompareSlugs() if args.compare_slugs else None
+    with BatchedWriter() as writer:
+        for result in results:
+            root = root_of[result.md_file]
+            for warning in result.warnings:
+                print(warning)
+            stats.update(result.stats)
+
+            if result.updated_content is not None:
+                root.changed_files += 1
+                if args.dry_run:
+                    with instrument.stage("diff"):
+                        print_diff(result.md_file, result.content, result.updated_content)
+                # Write the updated content back only if something changed
+                if not args.dry_run:
+                    # Only the time the writer's threads keep the loop waiting
+                    with instrument.stage("write"):
+                        writer.write(result.md_file, result.updated_content)
+
+            root.slug_index.update(result.md_file, result.macros)
+            if compare_slugs:
+                compare_slugs.add(result)
+
+            if root.manifest and not args.dry_run:
+                if result.updated_content is not None:
+                    # Rewritten files get their new stat once the writer is done
+                    root.written_files.append(result.md_file)
+                root.manifest.record(result.md_file,
+                                     None if result.updated_content is not None else result.signature,
+                                     result.digest, result.dependencies)
+
+    for root in roots:
+        root.finish(args.dry_run)
+
+    if compare_slugs:
+        compare_slugs.save(args.compare_slugs)
+        print(f"Wrote {compare_slugs.count()} slugs to compare to {args.compare_slugs}")
+
+    media_report.print_summary()
+    if args.media_report:
+        with open(args.media_report, "w") as file:
+            json.dump(media_report.as_dict(), file, indent=2)
+
+    if args.dry_run:
+        print_stats(stats)
+    prefilter_report.print_summary()
+    verb = "Would update" if args.dry_run else "Updated"
+    if len(roots) > 1:
+        for root in roots:
+            print(f"{root.folder}: {verb.lower()} {root.changed_files} of {root.total_files} files")
+    changed_files = sum(root.changed_files for root in roots)
+    total_files = sum(root.total_files for root in roots)
+    print(f"{verb} {changed_files} of {total_files} files")
+
+    if args.profile:
+        with open(args.profile, "w") as file:
+            json.dump({**instrument.profile.as_dict(time.perf_counter() - start_time),
+                       "prefilter": prefilter_report.as_dict()}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
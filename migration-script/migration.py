@@ -0,0 +1,395 @@
+import itertools
+import mmap
+import os
+import re
+import time
+from collections import Counter, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import instrument
+import sources
+from converters import all_types, find_macros, macro_example, replace_macros
+from lib import media_report
+from manifest import content_digest
+from meta_index import load_meta_index
+from preflight import preflight
+from sources import record_dependencies
+from walker import find_index_files
+
+# Library entry point of the migration: iter_migrations lazily yields what
+# migrating every index.md gives, leaving writing, diffing or indexing to the
+# caller.
+#
+#   from migration import iter_migrations
+#
+#   for result in iter_migrations("../content", "../interactive-examples"):
+#       if result.updated_content is not None:
+#           ...
+
+chunk_size = 32
+
+# What migrating one index.md produced. content is None for files without
+# EmbedInteractiveExample macros, which are never decoded; updated_content is
+# None when nothing changed; macros lists the (built path, line) of every EmbedInteractiveExample
+# macro and is None for files that were already migrated; warnings are the
+# messages the converters logged; stats counts macro outcomes per converter,
+# see replace_macros; signature, digest and dependencies are only filled in
+# for the incremental mode.
+FileResult = namedtuple("FileResult", [
+    "md_file", "content", "updated_content", "macros", "warnings", "stats",
+    "signature", "digest", "dependencies",
+])
+
+# Files are first searched for the macro as bytes, and only decoded and
+# scanned when it is there. Large files are searched through mmap.
+macro_marker = b"{{EmbedInteractiveExample"
+migrated_marker = b"{{InteractiveExample("
+# Built paths of the macros, found by the prefetcher without decoding pages;
+# a loose version of converters.macro_pattern, as reading a source too many
+# is harmless
+macro_path_pattern = re.compile(rb'^{{EmbedInteractiveExample\("([^"]+)"', re.MULTILINE)
+mmap_threshold = 1 << 20
+# One in this many ruled out files is also run through the full path, to
+# estimate the time the prefilter saves.
+prefilter_sample_rate = 64
+# Pages are read ahead in batches, along with the example sources they embed,
+# on this many threads per process; 0 reads everything when it is needed.
+prefetch_threads = 8
+prefetch_batch_size = chunk_size
+
+
+class PrefilterReport:
+    def __init__(self):
+        self.files = 0
+        self.ruled_out = 0
+        self.bytes_skipped = 0
+        self.sampled = 0
+        self.sample_seconds = 0.0
+
+    def merge(self, other):
+        for name, value in vars(other).items():
+            setattr(self, name, getattr(self, name) + value)
+
+    def take(self):
+        taken = PrefilterReport()
+        taken.merge(self)
+        self.__init__()
+        return taken
+
+    def saved_seconds(self):
+        if not self.sampled:
+            return None
+        return self.sample_seconds / self.sampled * self.ruled_out
+
+    def as_dict(self):
+        saved_seconds = self.saved_seconds()
+        return {
+            "files": self.files,
+            "ruled_out": self.ruled_out,
+            "bytes_skipped": self.bytes_skipped,
+            "estimated_seconds_saved": None if saved_seconds is None else round(saved_seconds, 6),
+        }
+
+    def print_summary(self):
+        saved_seconds = self.saved_seconds()
+        saved = "" if saved_seconds is None else f", about {saved_seconds:.3f} s saved"
+        print(f"Prefilter: {self.ruled_out} of {self.files} files without macros skipped{saved}")
+
+
+# Totals of the runs so far; each run counts on its own and adds its counts
+# here once its files are done
+prefilter_report = PrefilterReport()
+
+class MigrationRun:
+    # Settings and state of one migration: one per iter_migrations call when
+    # serial, so generators alive at the same time don't mix, and one per pool
+    # worker, set by init_worker so the read-only meta index is not pickled
+    # again for every chunk of files.
+
+    def __init__(self, meta_index, interactive_examples_folder, types, incremental, plans,
+                 threads=prefetch_threads):
+        self.meta_index = meta_index
+        self.interactive_examples_folder = interactive_examples_folder
+        self.types = types
+        self.incremental = incremental
+        self.plans = plans
+        self.prefilter_report = PrefilterReport()
+        self.prefetcher = Prefetcher(self, threads) if threads else None
+
+    def close(self):
+        if self.prefetcher:
+            self.prefetcher.close()
+
+
+worker_run = None
+
+
+class Prefetcher:
+    # Reads a batch of pages, and the sources of the examples they embed, on a
+    # thread pool while the previous batch is being migrated. Whatever the
+    # batch didn't use is dropped once it is done, so at most two batches are
+    # held at a time.
+
+    def __init__(self, run, threads):
+        self.run = run
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+        # md_file -> (stat, bytes)
+        self.pages = {}
+        # Sources read ahead before; the source cache has them from then on
+        self.fetched = set()
+        # Sources read ahead for batches that aren't finished yet
+        self.pending = set()
+
+    def start(self, md_files):
+        return [self.executor.submit(self.fetch_page, md_file) for md_file in md_files]
+
+    def fetch_page(self, md_file):
+        # Paths of the sources read ahead for the page
+        with open(md_file, "rb") as file:
+            stat = os.fstat(file.fileno())
+            if stat.st_size >= mmap_threshold:
+                return []
+            data = file.read()
+        self.pages[md_file] = (stat, data)
+        if macro_marker not in data:
+            return []
+
+        paths = []
+        try:
+            for match in macro_path_pattern.finditer(data):
+                key = macro_example(match.group(1).decode(), self.run.meta_index, self.run.types)
+                plan = self.run.plans.get(key) if key else None
+                for path in plan.paths.values() if plan else ():
+                    if path not in self.fetched:
+                        self.fetched.add(path)
+                        if sources.prefetch_source(path):
+                            self.pending.add(path)
+                            paths.append(path)
+        except (OSError, ValueError):
+            # Left to be reported when the source is read for real; the ones
+            # read ahead so far are still returned, for finish to drop
+            pass
+        return paths
+
+    def take_page(self, md_file):
+        return self.pages.pop(md_file, None)
+
+    def finish(self, md_files, futures):
+        paths = []
+        for future in futures:
+            try:
+                paths.extend(future.result())
+            except (OSError, ValueError):
+                # Left to be reported when the file is read for real
+                pass
+        for md_file in md_files:
+            self.pages.pop(md_file, None)
+        sources.discard_prefetched(paths)
+        self.pending.difference_update(paths)
+
+    def close(self):
+        # Waits for the fetches under way, so none adds sources after this,
+        # then drops what was read ahead for batches that were never finished,
+        # e.g. when the caller stopped iterating early
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        sources.discard_prefetched(self.pending)
+        self.pending.clear()
+        self.pages.clear()
+
+
+def read_prefiltered(md_file, incremental, prefetcher=None):
+    # (stat, bytes, has the macro, was migrated); the bytes are None for large
+    # files without the macro, unless the manifest needs their hash
+    if prefetcher and (prefetched := prefetcher.take_page(md_file)):
+        stat, data = prefetched
+        if macro_marker in data:
+            return stat, data, True, False
+        return stat, data, False, migrated_marker in data
+    with open(md_file, "rb") as file:
+        stat = os.fstat(file.fileno())
+        if stat.st_size < mmap_threshold:
+            data = file.read()
+            if macro_marker in data:
+                return stat, data, True, False
+            return stat, data, False, migrated_marker in data
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if mapped.find(macro_marker) != -1:
+                return stat, mapped[:], True, False
+            return (stat, mapped[:] if incremental else None, False,
+                    mapped.find(migrated_marker) != -1)
+
+
+def decode(data):
+    # What reading in text mode gives
+    content = data.decode()
+    if "\r" in content:
+        content = content.replace("\r\n", "\n").replace("\r", "\n")
+    return content
+
+
+def skip_file(md_file, stat, data, migrated, run):
+    # Result for a file the prefilter ruled out
+    report = run.prefilter_report
+    report.ruled_out += 1
+    report.bytes_skipped += stat.st_size
+    if data is not None and report.ruled_out % prefilter_sample_rate == 1:
+        # Decoding and scanning, less the search for the marker
+        start = time.perf_counter()
+        content = decode(data)
+        find_macros(content)
+        replace_macros(content, md_file, run.meta_index, run.interactive_examples_folder,
+                       run.types, log=lambda message: None, plans=run.plans)
+        middle = time.perf_counter()
+        macro_marker in data
+        end = time.perf_counter()
+        report.sample_seconds += (middle - start) - (end - middle)
+        report.sampled += 1
+
+    if run.incremental:
+        return FileResult(md_file, None, None, None if migrated else [], [], Counter(),
+                          [stat.st_mtime_ns, stat.st_size], content_digest(data), {})
+    return FileResult(md_file, None, None, None if migrated else [], [], Counter(),
+                      None, None, None)
+
+
+def migrate_file(md_file, run):
+    # Read the input content from each index.md file
+    with instrument.stage("read"):
+        stat, data, has_marker, migrated = read_prefiltered(md_file, run.incremental,
+                                                            run.prefetcher)
+        run.prefilter_report.files += 1
+        if not has_marker:
+            return skip_file(md_file, stat, data, migrated, run)
+        content = decode(data)
+
+    with instrument.stage("find_macros"):
+        macros = find_macros(content)
+        if not macros and "{{InteractiveExample(" in content:
+            macros = None
+
+    # Get the updated content with macros replaced
+    warnings = []
+    stats = Counter()
+    if run.incremental:
+        with instrument.stage("replace_macros"), record_dependencies() as dependencies:
+            updated_content = replace_macros(content, md_file, run.meta_index,
+                                             run.interactive_examples_folder, run.types,
+                                             log=warnings.append, stats=stats, plans=run.plans)
+        signature = [stat.st_mtime_ns, stat.st_size]
+        digest = content_digest(updated_content)
+    else:
+        with instrument.stage("replace_macros"):
+            updated_content = replace_macros(content, md_file, run.meta_index,
+                                             run.interactive_examples_folder, run.types,
+                                             log=warnings.append, stats=stats, plans=run.plans)
+        signature = digest = dependencies = None
+
+    return FileResult(md_file, content, updated_content if updated_content != content else None,
+                      macros, warnings, stats, signature, digest, dependencies)
+
+
+def init_worker(meta_index, interactive_examples_folder, types, incremental, plans,
+                threads=prefetch_threads, profile_options=None):
+    # Workers get a profile of their own, handed to the parent with each chunk
+    global worker_run
+    if profile_options is not None:
+        instrument.start(*profile_options)
+    worker_run = MigrationRun(meta_index, interactive_examples_folder, types, incremental,
+                              plans, threads)
+
+
+def migrate_files(md_files, run):
+    # Migrates md_files in order, reading the next batch ahead
+    prefetcher = run.prefetcher
+    if prefetcher is None:
+        for md_file in md_files:
+            with instrument.stage("migrate_file", md_file):
+                result = migrate_file(md_file, run)
+            yield result
+        return
+
+    batches = chunks(md_files, prefetch_batch_size)
+    batch = next(batches, None)
+    futures = prefetcher.start(batch) if batch else []
+    while batch:
+        next_batch = next(batches, None)
+        next_futures = prefetcher.start(next_batch) if next_batch else []
+        for md_file in batch:
+            with instrument.stage("migrate_file", md_file):
+                result = migrate_file(md_file, run)
+            yield result
+        prefetcher.finish(batch, futures)
+        batch, futures = next_batch, next_futures
+
+
+def migrate_chunk(md_files):
+    results = list(migrate_files(md_files, worker_run))
+    return (results, media_report.take(), worker_run.prefilter_report.take(),
+            instrument.profile and instrument.profile.take())
+
+
+def chunks(items, size):
+    items = iter(items)
+    while chunk := list(itertools.islice(items, size)):
+        yield chunk
+
+
+def migrate_serial(md_files, settings):
+    run = MigrationRun(*settings)
+    try:
+        yield from migrate_files(md_files, run)
+    finally:
+        run.close()
+        prefilter_report.merge(run.prefilter_report)
+
+
+def migrate_parallel(md_files, settings, jobs):
+    profile_options = None
+    if instrument.profile:
+        profile_options = (instrument.profile.top, instrument.profile.memory)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                             initargs=settings + (profile_options,)) as executor:
+        # Keep a bounded window of chunks in flight and consume them in
+        # submission order.
+        pending = deque()
+        for chunk in chunks(md_files, chunk_size):
+            pending.append(executor.submit(migrate_chunk, chunk))
+            if len(pending) >= jobs * 4:
+                yield from collect_chunk(pending.popleft())
+        while pending:
+            yield from collect_chunk(pending.popleft())
+
+
+def collect_chunk(future):
+    results, unmapped, prefiltered, profile = future.result()
+    media_report.merge(unmapped)
+    prefilter_report.merge(prefiltered)
+    if profile:
+        instrument.profile.merge(profile)
+    return results
+
+
+def iter_migrations(content_folder=".", interactive_examples_folder="../interactive-examples",
+                    types=all_types, jobs=1, md_files=None, meta_index=None, incremental=False,
+                    locales=None, plans=None, threads=prefetch_threads):
+    # Yields a FileResult per index.md under content_folder (only for the given
+    # locales, if any), or per file of md_files, in order. md_files are taken
+    # as given, including any under files/**/mdn, which find_index_files
+    # skips. At most a few chunks of files per worker are held at a time,
+    # however many files there are. Unmapped media are added to
+    # lib.media_report. plans default to a preflight of meta_index, see
+    # preflight.py. threads is the number of prefetch threads per process.
+    if meta_index is None:
+        with instrument.stage("meta_index"):
+            meta_index = load_meta_index(interactive_examples_folder)
+    if plans is None:
+        with instrument.stage("preflight"):
+            plans = preflight(meta_index, interactive_examples_folder, types)
+    if md_files is None:
+        md_files = find_index_files(content_folder, locales)
+
+    settings = (meta_index, interactive_examples_folder, tuple(types), incremental, plans,
+                threads)
+    if jobs > 1:
+        return migrate_parallel(md_files, settings, jobs)
+    return migrate_serial(md_files, settings)
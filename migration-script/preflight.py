@@ -0,0 +1,61 @@
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from meta_index import built_path, source_keys
+from renderer import layouts
+
+# Resolves every source path the meta index references in one pass before any
+# markdown is read, so converters get their paths, and the title as rendered,
+# without touching meta.json values again, and broken references are known up
+# front. Paths are checked on a thread pool, as on network or cold disks the
+# time goes into waiting on stat calls.
+
+preflight_threads = 16
+
+# What converting one index entry needs: paths maps the meta keys of the
+# sources that exist to their resolved path, missing lists the resolved paths
+# of referenced sources that don't.
+ExamplePlan = namedtuple("ExamplePlan", [
+    "example_type", "title", "escaped_title", "paths", "missing",
+])
+
+
+def resolved_paths(meta, interactive_examples_folder):
+    return {key: os.path.join(interactive_examples_folder, meta[key])
+            for key in source_keys if key in meta}
+
+
+def plan_example(example_type, meta, interactive_examples_folder, exists=os.path.isfile):
+    paths = {}
+    missing = []
+    for key, path in resolved_paths(meta, interactive_examples_folder).items():
+        if exists(path):
+            paths[key] = path
+        else:
+            missing.append(path)
+    return ExamplePlan(example_type, meta["title"], layouts[example_type].title(meta["title"]),
+                       paths, tuple(missing))
+
+
+def preflight(meta_index, interactive_examples_folder, types=None, threads=preflight_threads):
+    # ExamplePlan per index entry, for the given converter types if any
+    entries = {key: meta for key, meta in meta_index.items()
+               if types is None or key[0] in types}
+    paths = sorted({path for meta in entries.values()
+                    for path in resolved_paths(meta, interactive_examples_folder).values()})
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        existing = {path for path, found in zip(paths, executor.map(os.path.isfile, paths))
+                    if found}
+
+    return {(example_type, filename): plan_example(example_type, meta,
+                                                   interactive_examples_folder,
+                                                   existing.__contains__)
+            for (example_type, filename), meta in entries.items()}
+
+
+def broken_references(plans):
+    # (built path, missing source path) pairs, sorted
+    return sorted((built_path(example_type, filename), path)
+                  for (example_type, filename), plan in plans.items()
+                  for path in plan.missing)
@@ -0,0 +1,124 @@
+import html
+
+# Output layouts of the converters: an InteractiveExample macro followed by
+# code fences. Layouts are compiled once into flat steps, so rendering a macro
+# is one pass over its steps and a single join.
+
+
+def escape_title(title):
+    return html.escape(title, quote=True)
+
+
+def css_demo_title(title):
+    # tabbed css-examples are titled like html-examples
+    return escape_title(title.replace("HTML Demo:", "CSS Demo:"))
+
+
+class Fence:
+    # A ```<language> interactive-example``` block filled from one source.
+    # Optional fences are left out, along with the text before them, when
+    # their source is empty; `many` renders one fence per item of the source.
+
+    def __init__(self, source, language, kind="interactive-example", strip=str.rstrip,
+                 optional=False, many=False, before="\n\n"):
+        self.source = source
+        self.language = language
+        self.kind = kind
+        self.strip = strip
+        self.optional = optional
+        self.many = many
+        self.before = before
+
+
+class Layout:
+    def __init__(self, title, *parts):
+        self.title = title
+        # (literal text, opening, source, strip, optional, many) per fence.
+        # Literal text always renders, the opening (the text before the fence
+        # and its first line) only with the fence. Constant text is merged
+        # ahead of time wherever that doesn't change the output.
+        self.steps = []
+        text = ""
+        for part in parts:
+            if isinstance(part, str):
+                text += part
+                continue
+            opening = f"```{part.language} {part.kind}\n"
+            if part.many:
+                step = (text + part.before, opening)
+            elif part.optional:
+                step = (text, part.before + opening)
+            else:
+                step = ("", text + part.before + opening)
+            self.steps.append(step + (part.source, part.strip, part.optional, part.many))
+            text = ""
+        self.trailing_text = text
+
+    def render(self, escaped_title, other_args, suffix, sources):
+        # escaped_title is the title as self.title renders it
+        pieces = ['{{InteractiveExample("', escaped_title,
+                  f'", {other_args})}}}}' if other_args else '")}}']
+
+        for text, opening, source, strip, optional, many in self.steps:
+            if text:
+                pieces.append(text)
+            value = sources.get(source)
+            if optional and not value:
+                continue
+            if many:
+                separator = ""
+                for item in value:
+                    pieces.extend((separator, opening, strip(item), "\n```"))
+                    separator = "\n\n"
+            else:
+                pieces.extend((opening, strip(value) if strip else value, "\n```"))
+
+        if self.trailing_text:
+            pieces.append(self.trailing_text)
+        if suffix and "interactive-examples" not in suffix:
+            pieces.extend(("\n\n", suffix))
+        return "".join(pieces)
+
+
+layouts = {
+    "css": Layout(
+        escape_title,
+        Fence("choices", "css", kind="interactive-example-choice", many=True),
+        Fence("html", "html", strip=None),
+        Fence("css", "css", optional=True),
+        Fence("js", "js", optional=True),
+    ),
+    "js": Layout(
+        str,
+        Fence("js", "js"),
+    ),
+    "html": Layout(
+        escape_title,
+        Fence("html", "html"),
+        Fence("css", "css", optional=True),
+        Fence("js", "js", optional=True),
+    ),
+    "wat": Layout(
+        escape_title,
+        Fence("wat", "wat", strip=str.strip),
+        "\n\n",
+        Fence("js", "js", optional=True, before=""),
+    ),
+    "css-tabbed": Layout(
+        css_demo_title,
+        Fence("css", "css"),
+        Fence("html", "html"),
+        "\n\n",
+        Fence("js", "js", optional=True, before=""),
+    ),
+}
+
+
+def render(example_type, title, other_args, suffix, **sources):
+    layout = layouts[example_type]
+    return layout.render(layout.title(title), other_args, suffix, sources)
+
+
+def render_plan(plan, other_args, suffix, **sources):
+    # Same as render, with the title escaped ahead of time, see preflight
+    return layouts[plan.example_type].render(plan.escaped_title, other_args, suffix, sources)
@@ -0,0 +1,164 @@
+# Inverted index from embedded examples to the pages embedding them.
+#
+# Keys are the paths EmbedInteractiveExample macros use, e.g.
+# pages/css/flex-basis.html; values list the index.md files embedding them,
+# relative to the content root, with locale and line number. migrate.py keeps
+# the index up to date as it scans, and `migrate.py --changed-example` uses it
+# to only re-run the pages affected by an edit under live-examples.
+#
+#   python slug_index.py build
+#   python slug_index.py query pages/css/flex-basis.html
+#   python slug_index.py query live-examples/css-examples/flexbox/flex-basis.css
+
+import argparse
+import json
+import os
+
+from converters import find_macros
+from meta_index import built_path, cache_file, example_sources, load_meta_files
+from walker import find_index_files
+from writer import write_atomic
+
+index_version = 2
+
+
+def default_index_path(content_folder):
+    return cache_file("slug-index", content_folder, "json")
+
+
+def locale_of(md_file):
+    parts = os.path.normpath(md_file).split(os.sep)
+    if "files" in parts[:-1]:
+        return parts[parts.index("files") + 1]
+    return None
+
+
+class SlugIndex:
+    def __init__(self, path, pages, content_folder="."):
+        self.path = path
+        self.content_folder = content_folder
+        # index.md path relative to content_folder -> [(built path, line), ...],
+        # so the index reads the same whichever way the root was given
+        self.pages = pages
+
+    @classmethod
+    def load(cls, path, content_folder="."):
+        pages = {}
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return cls(path, pages, content_folder)
+        if data.get("version") != index_version:
+            return cls(path, pages, content_folder)
+        for slug, embeds in data["slugs"].items():
+            for page, locale, line in embeds:
+                pages.setdefault(page, []).append((slug, line))
+        return cls(path, pages, content_folder)
+
+    def md_file(self, page):
+        # Path of an indexed page, joined back onto the content root the way
+        # find_index_files gives it
+        return os.path.join(self.content_folder, page)
+
+    def md_files(self):
+        return [self.md_file(page) for page in self.pages]
+
+    def update(self, md_file, macros):
+        # None means the file wasn't scanned for macros, e.g. because it was
+        # already migrated; its previous entries stay.
+        if macros is None:
+            return
+        page = os.path.relpath(md_file, self.content_folder)
+        if macros:
+            self.pages[page] = list(macros)
+        else:
+            self.pages.pop(page, None)
+
+    def slugs(self):
+        # built path -> [(page, locale, line), ...], pages relative to the root
+        slugs = {}
+        for page, macros in sorted(self.pages.items()):
+            for slug, line in macros:
+                slugs.setdefault(slug, []).append((page, locale_of(page), line))
+        return slugs
+
+    def pages_for(self, slug):
+        return [(self.md_file(page), locale, line)
+                for page, locale, line in self.slugs().get(slug, [])]
+
+    def pages_embedding(self, slugs):
+        # md_files of the pages embedding any of slugs
+        pages_for = self.slugs()
+        return {self.md_file(page) for slug in slugs
+                for page, locale, line in pages_for.get(slug, [])}
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        data = {"version": index_version, "slugs": dict(sorted(self.slugs().items()))}
+        write_atomic(self.path, json.dumps(data, indent=1) + "\n")
+
+
+def slugs_for_example(example, interactive_examples_folder, meta_files=None):
+    # Built paths affected by a changed file under interactive-examples: an
+    # example source, a whole meta.json, or a built path given directly.
+    if example.startswith("pages/"):
+        return {example}
+
+    if meta_files is None:
+        meta_files = load_meta_files(interactive_examples_folder)
+    path = os.path.normpath(example)
+    if os.path.isabs(path) or path.startswith(os.pardir):
+        path = os.path.relpath(os.path.abspath(example),
+                               os.path.abspath(interactive_examples_folder))
+
+    slugs = set()
+    for relative_path, entries in meta_files.items():
+        meta_file = os.path.join("live-examples", relative_path)
+        for (example_type, filename), meta in entries:
+            if path == meta_file or path in map(os.path.normpath, example_sources(meta)):
+                slugs.add(built_path(example_type, filename))
+    return slugs
+
+
+def scan(content_folder):
+    for md_file in find_index_files(content_folder):
+        with open(md_file, "r", encoding="utf-8") as file:
+            yield md_file, find_macros(file.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the example -> pages index.")
+    parser.add_argument("--content", default=".",
+                        help="root of content or translated-content (default: %(default)s)")
+    parser.add_argument("--interactive-examples", default="../interactive-examples",
+                        help="interactive-examples checkout (default: %(default)s)")
+    parser.add_argument("--index", metavar="PATH",
+                        help="index file (default: one per content root under .cache)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("build", help="scan the content tree without migrating it")
+    query = subparsers.add_parser("query", help="list pages embedding an example")
+    query.add_argument("examples", nargs="+",
+                       help="built path (pages/css/flex-basis.html) or file under interactive-examples")
+    args = parser.parse_args()
+
+    index_path = args.index or default_index_path(args.content)
+    if args.command == "build":
+        index = SlugIndex(index_path, {}, args.content)
+        for md_file, macros in scan(args.content):
+            index.update(md_file, macros)
+        index.save()
+        print(f"Indexed {len(index.slugs())} examples on {len(index.pages)} pages")
+        return
+
+    index = SlugIndex.load(index_path, args.content)
+    slugs = set()
+    for example in args.examples:
+        slugs.update(slugs_for_example(example, args.interactive_examples))
+    for slug in sorted(slugs):
+        for md_file, locale, line in index.pages_for(slug):
+            print(f"{md_file}:{line}\t{locale}\t{slug}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import contextlib
+import functools
+import hashlib
+import os
+import threading
+
+import instrument
+import lib
+
+# Example sources are the same for every locale embedding them, so each one is
+# read and normalized once per process. Entries are keyed by path, mtime and
+# size, so an edited example is picked up on the next lookup.
+
+cache_size = 4096
+
+# Set by record_dependencies while a markdown file is being migrated, so the
+# incremental mode knows which example files and meta entries it used.
+recorded_dependencies = None
+
+# Raw text of example sources read ahead of the converters, see
+# migration.prefetch, until load_normalized takes it on first use. Past
+# prefetch_limit characters, sources are left to be read when needed.
+prefetch_limit = 32 << 20
+prefetched = {}
+prefetched_size = 0
+prefetch_lock = threading.Lock()
+
+
+def read(code):
+    return code
+
+
+@functools.lru_cache(maxsize=cache_size)
+def load_normalized(path, mtime_ns, size, normalize):
+    with instrument.stage("normalize_source"):
+        code = take_prefetched(path, mtime_ns, size)
+        if code is None:
+            with open(path, "r", encoding="utf-8") as file:
+                code = file.read()
+        with lib.media_source(path):
+            return normalize(code)
+
+
+def prefetch_source(path):
+    # Whether the source was added to the prefetched ones
+    global prefetched_size
+    stat = os.stat(path)
+    with open(path, "r", encoding="utf-8") as file:
+        code = file.read()
+    with prefetch_lock:
+        if path in prefetched or prefetched_size + len(code) > prefetch_limit:
+            return False
+        prefetched[path] = (stat.st_mtime_ns, stat.st_size, code)
+        prefetched_size += len(code)
+        return True
+
+
+def take_prefetched(path, mtime_ns, size):
+    global prefetched_size
+    with prefetch_lock:
+        entry = prefetched.pop(path, None)
+        if entry is None:
+            return None
+        prefetched_size -= len(entry[2])
+    # Edited since it was read ahead
+    if entry[:2] != (mtime_ns, size):
+        return None
+    return entry[2]
+
+
+def discard_prefetched(paths):
+    global prefetched_size
+    with prefetch_lock:
+        for path in paths:
+            entry = prefetched.pop(path, None)
+            if entry is not None:
+                prefetched_size -= len(entry[2])
+
+
+@functools.lru_cache(maxsize=cache_size)
+def digest_file(path, mtime_ns, size):
+    with open(path, "rb") as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+def file_digest(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return digest_file(path, stat.st_mtime_ns, stat.st_size)
+
+
+@contextlib.contextmanager
+def record_dependencies():
+    global recorded_dependencies
+    recorded_dependencies = {}
+    try:
+        yield recorded_dependencies
+    finally:
+        recorded_dependencies = None
+
+
+def add_dependency(key, digest):
+    if recorded_dependencies is not None:
+        recorded_dependencies[key] = digest
+
+
+def load_source(path, normalize=read):
+    stat = os.stat(path)
+    if recorded_dependencies is not None:
+        add_dependency(path, digest_file(path, stat.st_mtime_ns, stat.st_size))
+    return load_normalized(path, stat.st_mtime_ns, stat.st_size, normalize)
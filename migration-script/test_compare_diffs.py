@@ -0,0 +1,25 @@
+# python -m pytest test_compare_diffs.py, or python -m unittest test_compare_diffs
+
+import io
+import json
+import unittest
+from unittest import mock
+
+import compare_diffs
+
+
+class IterResultsTest(unittest.TestCase):
+    def test_chunk_boundaries(self):
+        # Every split of the document between chunks reads the same values
+        data = {"a": [1, 23, 4.5e10, -0.25e-3, True, None, "x, y"],
+                "b": [{"slug": "Web/API", "old": {"consoleResult": "> 1\n"}}], "c": []}
+        text = json.dumps(data)
+        expected = [(locale, result) for locale, results in data.items() for result in results]
+        for chunk_size in range(1, 12):
+            with self.subTest(chunk_size=chunk_size), \
+                    mock.patch.object(compare_diffs, "chunk_size", chunk_size):
+                self.assertEqual(list(compare_diffs.iter_results(io.StringIO(text))), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+# python -m pytest test_css_normalize.py, or python -m unittest test_css_normalize
+#
+# One case per rule normalize_output_css follows where it differs from the
+# str.replace chain it replaced; bench/bench_css_normalize.py lists where the
+# two differ on real sources.
+
+import unittest
+
+from css_normalize import normalize_output_css
+from lib import MediaReport
+
+old_media = "/media/cc0-videos/flower.webm"
+new_media = "/shared-assets/videos/flower.webm"
+
+
+def normalize(code):
+    return normalize_output_css(code, MediaReport())
+
+
+class NormalizeOutputCssTest(unittest.TestCase):
+    def test_whole_selector(self):
+        self.assertEqual(normalize("#output {\n  display: flex;\n}\n"),
+                         "body {\n  display: flex;\n}\n")
+        self.assertEqual(normalize(".output {\n  color: red;\n}\n"),
+                         "body {\n  color: red;\n}\n")
+
+    def test_whole_selector_before_newline(self):
+        self.assertEqual(normalize("#output\n{\n  color: red;\n}\n"),
+                         "body\n{\n  color: red;\n}\n")
+
+    def test_descendant_selector(self):
+        self.assertEqual(normalize("#output #example-element {\n  width: 60%;\n}\n"),
+                         "#example-element {\n  width: 60%;\n}\n")
+
+    def test_any_whitespace(self):
+        self.assertEqual(normalize(".output   .a,\n#output\t.b {\n  color: red;\n}\n"),
+                         ".a,\n.b {\n  color: red;\n}\n")
+
+    def test_compound_selector(self):
+        # .output on another element is a selector of its own
+        code = "div.output {\n  color: red;\n}\n.x.output .y {\n  color: blue;\n}\n"
+        self.assertEqual(normalize(code), code)
+
+    def test_longer_names(self):
+        code = "#outputs .a {\n  color: red;\n}\n#output-box {\n  color: red;\n}\n"
+        self.assertEqual(normalize(code), code)
+
+    def test_comments_and_strings(self):
+        code = '/* #output .a is scoped */\n.a::after {\n  content: "#output .b";\n}\n'
+        self.assertEqual(normalize(code), code)
+
+    def test_declaration_block(self):
+        # Only selectors are rewritten, not values that look like them
+        code = '.a {\n  grid-template-areas: ".output .b";\n  --x: { #output .c };\n}\n'
+        self.assertEqual(normalize(code), code)
+
+    def test_media_block(self):
+        self.assertEqual(
+            normalize("@media (min-width: 600px) {\n  @supports (display: grid) {\n"
+                      "    #output .a {\n      color: red;\n    }\n  }\n}\n#output {\n}\n"),
+            "@media (min-width: 600px) {\n  @supports (display: grid) {\n"
+            "    .a {\n      color: red;\n    }\n  }\n}\nbody {\n}\n")
+
+    def test_keyframes_block(self):
+        self.assertEqual(
+            normalize(f"@keyframes output {{\n  from {{\n    background: url({old_media});\n  }}\n}}\n"
+                      "#output .a {\n  animation: output 1s;\n}\n"),
+            f"@keyframes output {{\n  from {{\n    background: url({new_media});\n  }}\n}}\n"
+            ".a {\n  animation: output 1s;\n}\n")
+
+    def test_media_in_url_and_strings(self):
+        self.assertEqual(
+            normalize(f'.a {{\n  background: url({old_media});\n  mask: url("{old_media}");\n}}\n'
+                      f"/* {old_media} */\n"),
+            f'.a {{\n  background: url({new_media});\n  mask: url("{new_media}");\n}}\n'
+            f"/* {old_media} */\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+# python -m pytest test_html_extract.py, or python -m unittest test_html_extract
+#
+# html_extract's fast path has to give exactly what BeautifulSoup gives, or
+# give up and leave the page to it; bench/bench_css_extract.py runs the same
+# comparison over an interactive-examples checkout.
+
+import importlib.util
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench"))
+
+from bench_css_extract import generated_pages  # noqa: E402
+from html_extract import extract_css_example_fast, extract_css_example_soup  # noqa: E402
+
+
+def page(choices, output):
+    choice_list = "\n".join(f'  <pre><code class="language-css">{choice}</code></pre>'
+                            for choice in choices)
+    return f'<section class="example-choice-list">\n{choice_list}\n</section>\n' \
+           f'<div id="output" class="output">\n{output}\n</div>\n'
+
+
+# (name, page, whether the fast path takes it)
+edge_cases = [
+    ("entities", page(["content: &quot;&#8594;&quot;;", "a &amp; b &#x2014;"],
+                      "<p>x &lt; y &amp; &copy; &nbsp;&#160;&#x2192;</p>"), True),
+    ("uncommon entity", page(["a: b;"], "<p>Wait&hellip;</p>"), False),
+    ("void elements", page(["a: b;"], '<img src="a.png" alt="A"><br/><input type="checkbox" checked>'
+                                      "<hr></hr><wbr/>"), True),
+    ("whitespace in pre", page(["a: b;"], "<pre>\n   \n</pre>\n   \n<div>  </div><textarea> </textarea>"),
+     True),
+    ("quoted attributes", page(["a: b;"], """<div title='say "hi"' data-x="it's" """
+                                          """data-y='a "b" &#39;c&#39;'>x</div>"""), True),
+    ("spaced class list", page(["a: b;"], '<div class=" a  b ">x</div>'), False),
+]
+
+
+@unittest.skipUnless(importlib.util.find_spec("bs4"), "BeautifulSoup is not installed")
+class ExtractCssExampleTest(unittest.TestCase):
+    def assertSameAsSoup(self, example_code):
+        # Whether the fast path took the page
+        result = extract_css_example_fast(example_code)
+        if result is not None:
+            self.assertEqual(result, extract_css_example_soup(example_code))
+        return result is not None
+
+    def test_generated_pages(self):
+        fallbacks = sum(not self.assertSameAsSoup(example_code)
+                        for example_code in generated_pages(500))
+        self.assertEqual(fallbacks, 0)
+
+    def test_edge_cases(self):
+        for name, example_code, fast in edge_cases:
+            with self.subTest(name):
+                self.assertEqual(self.assertSameAsSoup(example_code), fast)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+# python -m pytest test_migration.py, or python -m unittest test_migration
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench"))
+
+import corpus  # noqa: E402
+import sources  # noqa: E402
+from meta_index import load_meta_index  # noqa: E402
+from migration import iter_migrations  # noqa: E402
+
+
+def outputs(results):
+    return [(result.md_file, result.updated_content) for result in results]
+
+
+class IterMigrationsTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.root = tempfile.mkdtemp()
+        cls.content, cls.interactive_examples = corpus.generate(cls.root, pages=80, examples=12)
+        cls.meta_index = load_meta_index(cls.interactive_examples, use_cache=False)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.root)
+
+    def migrate(self, **options):
+        return iter_migrations(self.content, self.interactive_examples,
+                               meta_index=self.meta_index, **options)
+
+    def test_serial_then_parallel(self):
+        # Pool workers forked after a serial run must not reuse its prefetch
+        # threads
+        serial = outputs(self.migrate())
+        parallel = outputs(self.migrate(jobs=2))
+        self.assertEqual(serial, parallel)
+        self.assertTrue(any(content is not None for md_file, content in serial))
+
+    def test_interleaved_generators(self):
+        # Serial runs keep their settings to themselves
+        js = self.migrate(types=("js",))
+        css = self.migrate(types=("css",))
+        interleaved = list(zip(js, css))
+        self.assertEqual(outputs(result for result, other in interleaved),
+                         outputs(self.migrate(types=("js",))))
+        self.assertEqual(outputs(other for result, other in interleaved),
+                         outputs(self.migrate(types=("css",))))
+
+    def test_closed_early(self):
+        # Sources read ahead for batches never migrated are dropped
+        results = self.migrate()
+        next(results)
+        results.close()
+        self.assertEqual(sources.prefetched, {})
+        self.assertEqual(sources.prefetched_size, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+# python -m pytest test_renderer.py, or python -m unittest test_renderer
+#
+# One golden output per layout, in the format the converters wrote before
+# renderer.py; bench/bench_render.py compares more cases against the old
+# templates.
+
+import unittest
+
+from renderer import render
+
+
+class RenderTest(unittest.TestCase):
+    def test_css(self):
+        output = render("css", "CSS Demo: <flex-basis>", '"taller"', "Some text.",
+                        choices=("flex-basis: auto;\n", "flex-basis: 0;"),
+                        html='<div class="box">Item</div>', css=".box {\n  color: red;\n}\n", js="")
+        self.assertEqual(output, '''{{InteractiveExample("CSS Demo: &lt;flex-basis&gt;", "taller")}}
+
+```css interactive-example-choice
+flex-basis: auto;
+```
+
+```css interactive-example-choice
+flex-basis: 0;
+```
+
+```html interactive-example
+<div class="box">Item</div>
+```
+
+```css interactive-example
+.box {
+  color: red;
+}
+```
+
+Some text.''')
+
+    def test_js(self):
+        # The old footer pointing at interactive-examples is dropped
+        output = render("js", "JavaScript Demo: Array.at()", "",
+                        "The source for this interactive example is stored in interactive-examples",
+                        js="const array = [5, 12];\nconsole.log(array.at(-1));\n")
+        self.assertEqual(output, '''{{InteractiveExample("JavaScript Demo: Array.at()")}}
+
+```js interactive-example
+const array = [5, 12];
+console.log(array.at(-1));
+```''')
+
+    def test_html(self):
+        output = render("html", 'HTML Demo: <a> "link"', "", None,
+                        html='<a href="#">Link</a>\n', css=None, js="console.log(1);\n")
+        self.assertEqual(output, '''{{InteractiveExample("HTML Demo: &lt;a&gt; &quot;link&quot;")}}
+
+```html interactive-example
+<a href="#">Link</a>
+```
+
+```js interactive-example
+console.log(1);
+```''')
+
+    def test_wat(self):
+        output = render("wat", "Wat Demo: add", "", "",
+                        wat="\n(module\n  (func $add))\n\n", js="WebAssembly.instantiate();\n")
+        self.assertEqual(output, '''{{InteractiveExample("Wat Demo: add")}}
+
+```wat interactive-example
+(module
+  (func $add))
+```
+
+```js interactive-example
+WebAssembly.instantiate();
+```''')
+        # Without js, the blank lines before it stay
+        output = render("wat", "Wat Demo: add", "", "", wat="(module)", js=None)
+        self.assertEqual(output, '{{InteractiveExample("Wat Demo: add")}}\n\n'
+                                 '```wat interactive-example\n(module)\n```\n\n')
+
+    def test_css_tabbed(self):
+        output = render("css-tabbed", "HTML Demo: ::before", '"tabbed-standard"', "",
+                        css="p::before {\n  content: '*';\n}\n", html="<p>Text</p>\n",
+                        js="console.log(1);")
+        self.assertEqual(output, '''{{InteractiveExample("CSS Demo: ::before", "tabbed-standard")}}
+
+```css interactive-example
+p::before {
+  content: '*';
+}
+```
+
+```html interactive-example
+<p>Text</p>
+```
+
+```js interactive-example
+console.log(1);
+```''')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+# python -m pytest test_writer.py, or python -m unittest test_writer
+
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+import writer
+from writer import write_atomic
+
+
+class WriteAtomicTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, "compare-diffs.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def mode(self):
+        return stat.S_IMODE(os.stat(self.path).st_mode)
+
+    @unittest.skipUnless(os.name == "posix", "file modes")
+    def test_new_file(self):
+        write_atomic(self.path, "[]")
+        self.assertEqual(self.mode(), 0o666 & ~writer.umask)
+
+    @unittest.skipUnless(os.name == "posix", "file modes")
+    def test_existing_file(self):
+        write_atomic(self.path, "[]")
+        os.chmod(self.path, 0o640)
+        write_atomic(self.path, "{}")
+        self.assertEqual(self.mode(), 0o640)
+        with open(self.path, "r") as file:
+            self.assertEqual(file.read(), "{}")
+
+    def test_utf8(self):
+        # Whatever the locale encoding, as pages are decoded as UTF-8
+        write_atomic(self.path, "Démonstration : <élément>")
+        with open(self.path, "rb") as file:
+            self.assertEqual(file.read(), "Démonstration : <élément>".encode())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import pickle
+
+from meta_index import cache_file
+from writer import write_atomic
+
+# Lazy replacement for glob("files/**/index.md"): directories are listed with
+# os.scandir, skipped when they can't hold pages to migrate, and their files
+# yielded in the order sorted(glob(...)) gives. Hidden entries are skipped like
+# glob does.
+#
+# With a listing cache, a directory whose mtime is unchanged since the last
+# run is not listed again; its subdirectories are still visited, as changes
+# further down don't touch its mtime.
+
+listing_cache_version = 1
+# Pages under these folders are never migrated, see replace_macros
+excluded_folders = ("mdn",)
+
+
+class ListingCache:
+    def __init__(self, path, listings):
+        self.path = path
+        # directory -> (mtime_ns, subdirectories, files)
+        self.listings = listings
+        self.changed = False
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, "rb") as file:
+                data = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return cls(path, {})
+        if data.get("version") != listing_cache_version:
+            return cls(path, {})
+        return cls(path, data["listings"])
+
+    def list(self, directory):
+        mtime_ns = os.stat(directory).st_mtime_ns
+        cached = self.listings.get(directory)
+        if cached and cached[0] == mtime_ns:
+            return cached[1], cached[2]
+        subdirectories, files = list_directory(directory)
+        self.listings[directory] = (mtime_ns, subdirectories, files)
+        self.changed = True
+        return subdirectories, files
+
+    def save(self):
+        if self.changed:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            write_atomic(self.path, pickle.dumps({"version": listing_cache_version,
+                                                  "listings": self.listings},
+                                                 protocol=pickle.HIGHEST_PROTOCOL))
+            self.changed = False
+
+
+def default_listing_cache_path(folder):
+    return cache_file("listings", folder, "pickle")
+
+
+def list_directory(directory):
+    subdirectories, files = [], []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir():
+                subdirectories.append(entry.name)
+            else:
+                files.append(entry.name)
+    return subdirectories, files
+
+
+def walk_files(folder, filename, prune=None, listing_cache=None):
+    # Yields folder/**/filename. prune(directory, name) returning True skips
+    # a subdirectory.
+    list_entries = listing_cache.list if listing_cache else list_directory
+    try:
+        subdirectories, files = list_entries(folder)
+    except (FileNotFoundError, NotADirectoryError):
+        return
+
+    # A directory's files come before its subdirectories' when their names
+    # sort before the subdirectory name followed by "/"
+    entries = sorted([(name, False) for name in files if name == filename]
+                     + [(name + "/", True) for name in subdirectories
+                        if not (prune and prune(folder, name))])
+    for name, is_directory in entries:
+        if is_directory:
+            yield from walk_files(os.path.join(folder, name[:-1]), filename, prune, listing_cache)
+        else:
+            yield os.path.join(folder, name)
+
+
+def find_index_files(content_folder, locales=None, listing_cache=None):
+    # index.md files of content_folder/files, only for the given locales if
+    # any, without the excluded folders
+    files_folder = os.path.join(content_folder, "files")
+    if locales is not None:
+        locales = {locale.lower() for locale in locales}
+
+    def prune(directory, name):
+        if name in excluded_folders:
+            return True
+        return locales is not None and directory == files_folder and name.lower() not in locales
+
+    return walk_files(files_folder, "index.md", prune, listing_cache)
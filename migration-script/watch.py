@@ -0,0 +1,241 @@
+# Keeps the meta index, the example sources and the content listing in memory
+# and re-migrates only the pages a change affects, for iterating on
+# media_map.json and the converters without a cold start each time:
+#
+#   python watch.py --content ../content --output ../migrated
+#
+# Pages are never rewritten in place, since a migrated page has no macros left
+# to convert again: the migrated version of every page the migration changes
+# is written under --output, at its path under the content root, and removed
+# from there once the page migrates to itself.
+#
+# Polls files/ for edited, added and removed pages, live-examples for edited
+# sources and meta.json files, and this folder for edits to media_map.json and
+# the converter modules, which are reloaded in place.
+
+import argparse
+import importlib
+import os
+import sys
+import time
+import traceback
+
+import converters
+import css_normalize
+import html_extract
+import lib
+import migration
+import preflight
+import renderer
+from meta_index import built_path, load_meta_files, merge_meta_files, meta_digest
+from slug_index import SlugIndex, slugs_for_example
+from walker import ListingCache, find_index_files
+from writer import write_atomic
+
+# Reloaded in this order when one of their files changes, so every module
+# picks up the new versions of the ones it imports from
+reloaded_modules = (lib, css_normalize, html_extract, renderer, preflight, converters,
+                    migration)
+
+
+def stat_files(paths):
+    signatures = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        signatures[path] = (stat.st_mtime_ns, stat.st_size)
+    return signatures
+
+
+def changed_paths(old, new):
+    return {path for path in old.keys() | new.keys() if old.get(path) != new.get(path)}
+
+
+def walk_files(folder):
+    for dirpath, dirnames, filenames in os.walk(folder):
+        dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+        for filename in filenames:
+            yield os.path.join(dirpath, filename)
+
+
+def module_files():
+    return [module.__file__ for module in reloaded_modules] + [lib.media_map_path]
+
+
+class Watcher:
+    def __init__(self, content_folder, interactive_examples_folder, output_folder,
+                 types=converters.all_types, locales=None):
+        self.content_folder = content_folder
+        self.interactive_examples_folder = interactive_examples_folder
+        self.live_examples_folder = os.path.join(interactive_examples_folder, "live-examples")
+        self.output_folder = output_folder
+        self.types = types
+        self.locales = locales
+        # Directory listings are only kept in memory
+        self.listing_cache = ListingCache(None, {})
+        self.slug_index = SlugIndex(None, {}, content_folder)
+
+        self.load_examples()
+        self.pages = self.page_signatures()
+        self.sources = stat_files(walk_files(self.live_examples_folder))
+        self.modules = stat_files(module_files())
+
+    def load_examples(self):
+        self.meta_files = load_meta_files(self.interactive_examples_folder)
+        self.meta_index = merge_meta_files(self.meta_files)
+        self.plans = preflight.preflight(self.meta_index, self.interactive_examples_folder,
+                                         self.types)
+
+    def page_signatures(self):
+        return stat_files(find_index_files(self.content_folder, self.locales,
+                                           self.listing_cache))
+
+    def output_path(self, md_file):
+        return os.path.join(self.output_folder, os.path.relpath(md_file, self.content_folder))
+
+    def migrate(self, md_files):
+        # Number of pages the migration changed
+        changed = 0
+        for result in migration.iter_migrations(
+                interactive_examples_folder=self.interactive_examples_folder, types=self.types,
+                md_files=md_files, meta_index=self.meta_index, plans=self.plans):
+            for warning in result.warnings:
+                print(warning)
+            self.slug_index.update(result.md_file, result.macros)
+            output_path = self.output_path(result.md_file)
+            if result.updated_content is not None:
+                changed += 1
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                write_atomic(output_path, result.updated_content)
+            elif os.path.exists(output_path):
+                os.remove(output_path)
+        lib.media_report.print_summary()
+        lib.media_report.take()
+        return changed
+
+    def remove(self, md_file):
+        self.slug_index.update(md_file, [])
+        if os.path.exists(self.output_path(md_file)):
+            os.remove(self.output_path(md_file))
+
+    def reload_modules(self, changed_modules):
+        # Built paths whose output may differ after the reload; None for all
+        old_media_map = dict(lib.media_map)
+        for module in reloaded_modules:
+            importlib.reload(module)
+        if any(path != lib.media_map_path for path in changed_modules):
+            return None
+
+        # Only media_map.json changed: examples whose sources mention a
+        # remapped media path
+        media = {path for path in old_media_map.keys() | lib.media_map.keys()
+                 if old_media_map.get(path) != lib.media_map.get(path)}
+        slugs = set()
+        for (example_type, filename), plan in self.plans.items():
+            for path in plan.paths.values():
+                with open(path, "r", encoding="utf-8") as file:
+                    code = file.read()
+                if any(old_media in code for old_media in media):
+                    slugs.add(built_path(example_type, filename))
+                    break
+        return slugs
+
+    def poll(self):
+        pages = self.page_signatures()
+        sources = stat_files(walk_files(self.live_examples_folder))
+        modules = stat_files(module_files())
+        changed_pages = changed_paths(self.pages, pages)
+        changed_sources = changed_paths(self.sources, sources)
+        changed_modules = changed_paths(self.modules, modules)
+        if not (changed_pages or changed_sources or changed_modules):
+            return
+        start = time.perf_counter()
+
+        md_files = changed_pages & pages.keys()
+        removed = changed_pages - pages.keys()
+        for md_file in removed:
+            self.remove(md_file)
+        slugs = set()
+
+        if changed_modules:
+            # Taken first, so a module that fails to reload, e.g. with a
+            # syntax error, is reported once rather than on every poll until
+            # its next edit
+            self.modules = modules
+            reloaded_slugs = self.reload_modules(changed_modules)
+            if reloaded_slugs is None:
+                md_files.update(self.slug_index.md_files())
+            else:
+                slugs.update(reloaded_slugs)
+
+        if changed_sources:
+            old_meta_index = self.meta_index
+            # Plans record which sources exist
+            if changed_modules or sources.keys() ^ self.sources.keys() or any(
+                    os.path.basename(path) == "meta.json" for path in changed_sources):
+                self.load_examples()
+            for key in (old_meta_index.keys() | self.meta_index.keys()
+                        if self.meta_index is not old_meta_index else ()):
+                if meta_digest(old_meta_index.get(key)) != meta_digest(self.meta_index.get(key)):
+                    slugs.add(built_path(*key))
+            for path in changed_sources:
+                slugs.update(slugs_for_example(
+                    os.path.relpath(path, self.interactive_examples_folder),
+                    self.interactive_examples_folder, self.meta_files))
+        elif changed_modules:
+            self.load_examples()
+        self.pages, self.sources = pages, sources
+
+        if slugs:
+            md_files.update(self.slug_index.pages_embedding(slugs))
+        changed = self.migrate(sorted(md_files))
+        print(f"Re-migrated {len(md_files)} pages, {changed} changed"
+              + (f", {len(removed)} removed" if removed else "")
+              + f", in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def run(self, interval):
+        start = time.perf_counter()
+        changed = self.migrate(sorted(self.pages))
+        print(f"Migrated {len(self.pages)} pages, {changed} changed, "
+              f"in {time.perf_counter() - start:.1f} s; watching for changes")
+        while True:
+            time.sleep(interval)
+            try:
+                self.poll()
+            except Exception:
+                # e.g. a syntax error in a converter being edited; the next
+                # change is picked up as usual
+                traceback.print_exc()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-migrate the pages affected by each change to content, examples or converters.")
+    parser.add_argument("--content", default=".",
+                        help="root of content or translated-content (default: %(default)s)")
+    parser.add_argument("--interactive-examples", default="../interactive-examples",
+                        help="interactive-examples checkout (default: %(default)s)")
+    parser.add_argument("--output", required=True, metavar="FOLDER",
+                        help="folder the migrated pages are written to")
+    parser.add_argument("--locale", nargs="+", metavar="LOCALE",
+                        help="only migrate these locales, e.g. en-us fr (default: all)")
+    parser.add_argument("--types", nargs="+", choices=converters.all_types,
+                        default=list(converters.all_types), help="converters to run (default: all)")
+    parser.add_argument("--interval", type=float, default=0.5,
+                        help="seconds between polls (default: %(default)s)")
+    args = parser.parse_args()
+
+    if os.path.abspath(args.output) == os.path.abspath(args.content):
+        sys.exit("--output must not be the content root")
+    watcher = Watcher(args.content, args.interactive_examples, args.output, args.types,
+                      args.locale)
+    try:
+        watcher.run(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
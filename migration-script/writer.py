@@ -0,0 +1,83 @@
+import contextlib
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Read once, as os.umask can only be read by setting it, which isn't safe
+# once writer threads run
+umask = os.umask(0)
+os.umask(umask)
+
+
+@contextlib.contextmanager
+def open_atomic(path, mode="w"):
+    # Write next to the target and rename over it, so an interrupted run leaves
+    # either the old or the new file, never a truncated one.
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp",
+                                    dir=directory or ".")
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else "utf-8") as out_file:
+            yield out_file
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        else:
+            # mkstemp creates the file owner-only; a new file gets what open()
+            # would have given it
+            os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_atomic(path, content):
+    with open_atomic(path, "wb" if isinstance(content, bytes) else "w") as out_file:
+        out_file.write(content)
+
+
+def write_batch(batch):
+    for path, content in batch:
+        write_atomic(path, content)
+
+
+class BatchedWriter:
+    # Collects changed files and writes them in batches on a small thread pool.
+    # Use as a context manager; leaving the block flushes and waits for every
+    # pending write, re-raising the first error.
+
+    def __init__(self, batch_size=64, max_workers=4):
+        self.batch_size = batch_size
+        self.max_pending = max_workers * 2
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.batch = []
+        self.futures = []
+        self.written = 0
+
+    def write(self, path, content):
+        self.batch.append((path, content))
+        self.written += 1
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.batch:
+            self.futures.append(self.executor.submit(write_batch, self.batch))
+            self.batch = []
+        # Surface errors early and keep the number of pending batches bounded.
+        while self.futures and (self.futures[0].done() or len(self.futures) > self.max_pending):
+            self.futures.pop(0).result()
+
+    def close(self):
+        self.flush()
+        self.executor.shutdown(wait=True)
+        for future in self.futures:
+            future.result()
+        self.futures = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()